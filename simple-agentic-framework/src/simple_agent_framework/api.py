@@ -115,8 +115,30 @@ def create_app(
         location_id: int | None = None,
         include_snoozed: bool = False,
         limit: int = 200,
+        fields: str | None = None,
     ) -> list[dict[str, Any]]:
-        return engine.list_alerts(
+        field_set = (
+            {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+        )
+        try:
+            return engine.list_alerts(
+                status=status,
+                location_id=location_id,
+                include_snoozed=include_snoozed,
+                limit=limit,
+                fields=field_set,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    @app.get("/api/alerts/summary")
+    def list_alerts_summary(
+        status: str | None = None,
+        location_id: int | None = None,
+        include_snoozed: bool = False,
+        limit: int = 200,
+    ) -> list[dict[str, Any]]:
+        return engine.list_alerts_summary(
             status=status,
             location_id=location_id,
             include_snoozed=include_snoozed,
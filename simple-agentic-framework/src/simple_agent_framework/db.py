@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import datetime
 import sqlite3
-from collections.abc import Mapping
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
 import os
 from pathlib import Path
 from typing import Any
 
 import polars as pl
+from sqlalchemy import event
 from sqlmodel import SQLModel, create_engine
 
+# Let callers pass date objects straight through query params instead of
+# formatting ISO strings at every call site.
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+
 
 @dataclass(frozen=True)
 class VendingDbPaths:
@@ -46,8 +52,37 @@ def make_sqlite_url(db_path: Path | str) -> str:
     return f"sqlite:///{Path(db_path).resolve()}"
 
 
+# One engine (and thus one connection pool) per database file for the whole
+# process: ensure_agent_schema and every DailyAlertEngine pointed at the same
+# state DB share pooled connections instead of each building an engine and
+# re-running the connect-time PRAGMA setup.
+_ENGINE_CACHE: dict[Path, Any] = {}
+
+
 def make_engine(db_path: Path | str):
-    return create_engine(make_sqlite_url(db_path), echo=False)
+    db_path = Path(db_path).resolve()
+    cached = _ENGINE_CACHE.get(db_path)
+    if cached is not None:
+        return cached
+    engine = create_engine(make_sqlite_url(db_path), echo=False)
+
+    @event.listens_for(engine, "connect")
+    def _set_state_db_pragmas(dbapi_conn, _connection_record) -> None:
+        cursor = dbapi_conn.cursor()
+        # WAL lets API readers (alert lists, dashboards) proceed while a
+        # backtest is writing alerts/inventory, instead of blocking on the
+        # rollback journal. synchronous=NORMAL then drops the per-commit
+        # fsync — the dominant cost of the alert persistence loop on slow
+        # storage — while staying crash-safe under WAL.
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute("PRAGMA cache_size = -65536")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA mmap_size = 268435456")
+        cursor.close()
+
+    _ENGINE_CACHE[db_path] = engine
+    return engine
 
 
 def ensure_agent_schema(state_db: Path | str) -> None:
@@ -61,10 +96,19 @@ def sqlite_conn(db_path: Path | str, *, readonly: bool = False) -> sqlite3.Conne
     if readonly:
         if not db_path.exists():
             raise FileNotFoundError(str(db_path))
-        conn = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+        # cached_statements raises sqlite3's compiled-statement LRU (default
+        # 128) so repeated queries skip SQL re-parsing across backtest days.
+        conn = sqlite3.connect(
+            f"file:{db_path.as_posix()}?mode=ro", uri=True, cached_statements=256
+        )
         conn.execute("PRAGMA query_only = ON")
+        # Read-heavy facts/analysis queries: serve pages via mmap instead of
+        # copying into the connection cache, and keep sort/temp state in RAM.
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA temp_store = MEMORY")
     else:
-        conn = sqlite3.connect(str(db_path), uri=False)
+        conn = sqlite3.connect(str(db_path), uri=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -123,6 +167,31 @@ def query_one(
     return dict(row) if row else None
 
 
+def query_iter(
+    db_path: Path | str,
+    query: str,
+    params: tuple[Any, ...] = (),
+    *,
+    attachments: Mapping[str, Path | str] | None = None,
+    readonly: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Yield result rows one at a time instead of materializing them all.
+
+    For fleet-wide result sets that feed a streaming consumer (dict builds,
+    chunked inserts), peak memory stays at one row rather than O(rows), and
+    the consumer starts working before the full SELECT has been drained.
+    """
+    conn = sqlite_conn(db_path, readonly=readonly)
+    try:
+        if attachments:
+            for alias, path in attachments.items():
+                _attach_database(conn, alias=alias, db_path=path, readonly=readonly)
+        for row in conn.execute(query, params):
+            yield dict(row)
+    finally:
+        conn.close()
+
+
 def query_df(
     db_path: Path | str,
     query: str,
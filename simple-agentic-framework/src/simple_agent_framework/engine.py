@@ -2,16 +2,22 @@ from __future__ import annotations
 
 import hashlib
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
 from datetime import date, datetime, timedelta
-from itertools import count
+from itertools import groupby
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
+from uuid import uuid4
 
+import orjson
 from loguru import logger
 from pydantic import ValidationError
-from sqlalchemy import delete, desc
+from sqlalchemy import delete, desc, update
 from sqlmodel import Session, select
 
 from .alert_payload import AlertPayload
@@ -20,10 +26,13 @@ from .db import (
     resolve_vending_db_paths,
     ensure_agent_schema,
     query_all,
+    query_iter,
     query_one,
     make_engine,
 )
 from .llm_review import review_alert_with_ai
+from .llm_script_edit import edit_script_with_ai, validate_sandbox_compatibility
+from .llm_script_final_check import final_check_script_draft_with_ai
 from .models import (
     Alert,
     AlertSuppression,
@@ -35,12 +44,97 @@ from .models import (
     ScriptSetting,
 )
 from .script_context import build_script_context
-from .script_registry import discover_scripts
+from .script_registry import SCRIPTS_DIR, discover_scripts
 from .script_runner import ScriptExecutionError, run_script
 from .time_utils import utc_now
 from .types import ActionType
 
 
+# Fast-path shape check for timestamps coming back from sqlite; cheaper than
+# letting datetime.fromisoformat raise on empty/odd strings per row.
+_ISO_DT = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}")
+
+
+def _execute_scripts_for_machine(
+    prepared_scripts: list[tuple[str, str, str]],
+    context: dict[str, Any],
+) -> tuple[int, list[tuple[str, str, dict[str, Any]]], list[str]]:
+    """Run every prepared script against one machine context.
+
+    Module-level so ProcessPoolExecutor can pickle it; returns the executed
+    script count, (script_name, script_version, payload) tuples, and any
+    execution error messages for the parent process to log.
+    """
+    script_count = 0
+    emitted: list[tuple[str, str, dict[str, Any]]] = []
+    errors: list[str] = []
+    for script_name, code, script_version in prepared_scripts:
+        script_count += 1
+        try:
+            outputs = run_script(script_name=script_name, code=code, context=context)
+        except ScriptExecutionError as exc:
+            errors.append(f"{script_name} failed: {exc}")
+            continue
+        for payload in outputs:
+            emitted.append((script_name, script_version, payload))
+    return script_count, emitted, errors
+
+
+# The prepared script list is constant for a whole run, so ship it to each
+# worker process once at pool start instead of pickling it with every chunk
+# of machine contexts.
+_WORKER_PREPARED_SCRIPTS: list[tuple[str, str, str]] = []
+
+
+def _init_script_worker(prepared_scripts: list[tuple[str, str, str]]) -> None:
+    global _WORKER_PREPARED_SCRIPTS
+    _WORKER_PREPARED_SCRIPTS = prepared_scripts
+
+
+def _execute_scripts_in_worker(
+    context: dict[str, Any],
+) -> tuple[int, list[tuple[str, str, dict[str, Any]]], list[str]]:
+    return _execute_scripts_for_machine(_WORKER_PREPARED_SCRIPTS, context)
+
+
+@dataclass(frozen=True, slots=True)
+class CapacityLookup:
+    """Derived capacity lookup tables shared by the summary/inventory paths.
+
+    Built once per engine instance from the memoized capacity facts so
+    back-to-back dashboard calls don't re-group the same rows.
+    """
+
+    model_ids: dict[str, int]
+    by_model_ing: dict[tuple[int, int], dict[str, Any]]
+    by_model: dict[str, list[tuple[int, dict[str, Any]]]]
+    machine_model_id: dict[int, int]
+
+
+class StateDates(NamedTuple):
+    """Immutable snapshot of the EngineState row for read-only callers."""
+
+    start_day: date
+    end_day: date
+    current_day: date
+    updated_at: datetime
+
+
+class IngredientRow(NamedTuple):
+    """Per-ingredient inventory record; far lighter than a 10-key dict while
+    the snapshot is being assembled. Converted via _asdict() only at the JSON
+    boundary."""
+
+    ingredient_id: int
+    name: str
+    quantity: float
+    unit: str
+    capacity: float | None
+    capacity_unit: str
+    start_quantity: float
+    end_quantity: float | None
+
+
 @dataclass(frozen=True)
 class RunSummary:
     run_date: str
@@ -63,6 +157,20 @@ class DailyAlertEngine:
         ensure_agent_schema(self.state_db)
         self.sql_engine = make_engine(self.state_db)
 
+        self._loc_ccy_cache: tuple[float, dict[int, str]] | None = None
+        self._related_alerts_cache: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+        self._state_cache: StateDates | None = None
+        self._inventory_through: date | None = None
+        # Facts are immutable for the life of a run; scripts invalidate on edit.
+        self._facts_machines_cache: list[dict[str, Any]] | None = None
+        self._facts_capacities_cache: list[dict[str, Any]] | None = None
+        self._caps_lookup_cache: CapacityLookup | None = None
+        self._active_scripts_cache: list[tuple[str, str]] | None = None
+        self._baseline_scripts_cache: (
+            tuple[tuple[float, tuple[str, ...]], dict[str, str]] | None
+        ) = None
+        self._prepared_scripts_cache: list[tuple[str, str, str]] | None = None
+
         self._run_id = self._resolve_latest_run_id()
         self._ensure_state()
         self._ensure_inventory_seed()
@@ -101,9 +209,31 @@ class DailyAlertEngine:
                 )
                 session.add(state)
                 session.commit()
+        self._state_cache = None
+
+    def _engine_state(self) -> StateDates:
+        """Cached snapshot of the singleton EngineState row.
+
+        The row only changes through this instance (reset_state, skip_to_day,
+        advance_day), and those all drop the cache after committing, so
+        read-only callers skip a Session + SELECT per request.
+        """
+        if self._state_cache is not None:
+            return self._state_cache
+        with Session(self.sql_engine) as session:
+            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
+            self._state_cache = StateDates(
+                start_day=state.start_day,
+                end_day=state.end_day,
+                current_day=state.current_day,
+                updated_at=state.updated_at,
+            )
+        return self._state_cache
 
     def _facts_machines(self) -> list[dict[str, Any]]:
-        return query_all(
+        if self._facts_machines_cache is not None:
+            return self._facts_machines_cache
+        self._facts_machines_cache = query_all(
             self.dbs.facts_db,
             """
             SELECT m.id AS machine_id,
@@ -117,9 +247,12 @@ class DailyAlertEngine:
             """,
             readonly=True,
         )
+        return self._facts_machines_cache
 
     def _facts_capacities(self) -> list[dict[str, Any]]:
-        return query_all(
+        if self._facts_capacities_cache is not None:
+            return self._facts_capacities_cache
+        self._facts_capacities_cache = query_all(
             self.dbs.facts_db,
             """
             SELECT cap.machine_model AS machine_model,
@@ -133,16 +266,59 @@ class DailyAlertEngine:
             """,
             readonly=True,
         )
+        return self._facts_capacities_cache
+
+    def _caps_lookup(self) -> CapacityLookup:
+        if self._caps_lookup_cache is not None:
+            return self._caps_lookup_cache
+        # Small-int model ids keep hot capacity lookups hashing (int, int)
+        # tuples instead of rehashing the model name string per row.
+        model_ids: dict[str, int] = {}
+        by_model_ing: dict[tuple[int, int], dict[str, Any]] = {}
+        by_model: dict[str, list[tuple[int, dict[str, Any]]]] = defaultdict(list)
+        for r in self._facts_capacities():
+            model = r["machine_model"]
+            iid = r["ingredient_id"]
+            mdl = model_ids.setdefault(model, len(model_ids))
+            by_model_ing[(mdl, iid)] = r
+            by_model[model].append((iid, r))
+        machine_model_id = {
+            m["machine_id"]: model_ids.get(m["machine_model"], -1)
+            for m in self._facts_machines()
+        }
+        self._caps_lookup_cache = CapacityLookup(
+            model_ids=model_ids,
+            by_model_ing=by_model_ing,
+            by_model=dict(by_model),
+            machine_model_id=machine_model_id,
+        )
+        return self._caps_lookup_cache
+
+    def invalidate_facts(self) -> None:
+        """Drop the memoized machine/capacity fact rows.
+
+        The facts DB is maintained outside this process, so there is no ingest
+        hook to bump a version counter from; callers that know the facts files
+        were rebuilt invalidate explicitly, mirroring
+        invalidate_location_currency.
+        """
+        self._facts_machines_cache = None
+        self._facts_capacities_cache = None
+        self._caps_lookup_cache = None
 
     def _ensure_inventory_seed(self) -> None:
+        start_day = self._engine_state().start_day
         with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            start_day = state.start_day
             machines = self._facts_machines()
             capacities = self._facts_capacities()
-            caps_by_model: dict[str, list[dict[str, Any]]] = {}
-            for row in capacities:
-                caps_by_model.setdefault(str(row["machine_model"]), []).append(row)
+            # _facts_capacities already orders by machine_model, so group in
+            # one pass instead of a setdefault probe per row.
+            caps_by_model: dict[str, list[dict[str, Any]]] = {
+                model: list(group)
+                for model, group in groupby(
+                    capacities, key=lambda r: str(r["machine_model"])
+                )
+            }
 
             existing_pairs = session.exec(
                 select(InventoryState.machine_id, InventoryState.ingredient_id).where(
@@ -151,7 +327,10 @@ class DailyAlertEngine:
             ).all()
             existing_keys = {(int(mid), int(iid)) for mid, iid in existing_pairs}
 
-            to_add: list[InventoryState] = []
+            # bulk_insert_mappings skips ORM instrumentation per row, so the
+            # Python-side default factories must be supplied explicitly.
+            now = utc_now()
+            to_add: list[dict[str, Any]] = []
             for m in machines:
                 model = str(m["machine_model"])
                 for cap in caps_by_model.get(model, []):
@@ -159,18 +338,19 @@ class DailyAlertEngine:
                     if key in existing_keys:
                         continue
                     capacity = float(cap["capacity"])
-                    qty = max(0.0, capacity * 0.9)
                     to_add.append(
-                        InventoryState(
-                            date=start_day,
-                            machine_id=int(m["machine_id"]),
-                            ingredient_id=int(cap["ingredient_id"]),
-                            quantity_on_hand=qty,
-                            unit=str(cap["unit"]),
-                        )
+                        {
+                            "id": str(uuid4()),
+                            "date": start_day,
+                            "machine_id": key[0],
+                            "ingredient_id": key[1],
+                            "quantity_on_hand": max(0.0, capacity * 0.9),
+                            "unit": str(cap["unit"]),
+                            "updated_at": now,
+                        }
                     )
             if to_add:
-                session.add_all(to_add)
+                session.bulk_insert_mappings(InventoryState, to_add)
                 session.commit()
 
     def _projection_anchor_date(
@@ -236,11 +416,44 @@ class DailyAlertEngine:
             out[iid] = (float(r.get("qty") or 0.0), str(r.get("unit") or ""))
         return out
 
+    def _predicted_consumption_for_day_bulk(
+        self, *, run_id: str, day: date
+    ) -> dict[int, dict[int, tuple[float, str]]]:
+        """Like _predicted_consumption_for_day, but one query for every machine."""
+        rows = query_iter(
+            self.dbs.analysis_db,
+            """
+            SELECT p.machine_id AS machine_id,
+                   p.ingredient_id AS ingredient_id,
+                   p.forecast_quantity AS qty,
+                   p.unit AS unit
+            FROM sim_daily_ingredient_projection p
+            JOIN (
+                SELECT machine_id, MAX(projection_date) AS projection_date
+                FROM sim_daily_ingredient_projection
+                WHERE run_id = ?
+                  AND forecast_date = ?
+                  AND projection_date <= ?
+                GROUP BY machine_id
+            ) latest ON latest.machine_id = p.machine_id
+                    AND latest.projection_date = p.projection_date
+            WHERE p.run_id = ?
+              AND p.forecast_date = ?
+            """,
+            (run_id, day.isoformat(), day.isoformat(), run_id, day.isoformat()),
+            readonly=True,
+        )
+        out: defaultdict[int, dict[int, tuple[float, str]]] = defaultdict(dict)
+        for r in rows:
+            out[int(r["machine_id"])][int(r["ingredient_id"])] = (
+                float(r.get("qty") or 0.0),
+                str(r.get("unit") or ""),
+            )
+        return out
+
     def schedule_machine_restock(self, *, machine_id: int) -> dict[str, Any]:
+        effective_date = self._engine_state().current_day + timedelta(days=1)
         with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            effective_date = state.current_day + timedelta(days=1)
-
             machine = query_one(
                 self.dbs.facts_db,
                 "SELECT id, location_id FROM machine WHERE id = ?",
@@ -281,14 +494,13 @@ class DailyAlertEngine:
             }
 
     def get_state(self) -> dict[str, str]:
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            return {
-                "start_day": state.start_day.isoformat(),
-                "end_day": state.end_day.isoformat(),
-                "current_day": state.current_day.isoformat(),
-                "updated_at": state.updated_at.isoformat(timespec="seconds"),
-            }
+        state = self._engine_state()
+        return {
+            "start_day": state.start_day.isoformat(),
+            "end_day": state.end_day.isoformat(),
+            "current_day": state.current_day.isoformat(),
+            "updated_at": state.updated_at.isoformat(timespec="seconds"),
+        }
 
     def reset_state(self) -> dict[str, str]:
         with Session(self.sql_engine) as session:
@@ -301,6 +513,8 @@ class DailyAlertEngine:
             state.updated_at = utc_now()
             session.add(state)
             session.commit()
+        self._state_cache = None
+        self._inventory_through = None
         self._ensure_inventory_seed()
         return self.get_state()
 
@@ -332,18 +546,32 @@ class DailyAlertEngine:
 
     def _invalidate_current_day_run(self) -> None:
         """Clear the RunLog for the current day so scripts are re-executed."""
+        current_day = self._engine_state().current_day
         with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            existing = session.get(RunLog, state.current_day)
-            if existing is not None:
-                session.delete(existing)
-                session.commit()
+            # One targeted DELETE; no need to load the row just to delete it.
+            session.exec(delete(RunLog).where(RunLog.run_date == current_day))
+            session.commit()
 
     def _sha12(self, text: str) -> str:
         return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
 
     def _baseline_scripts(self) -> dict[str, str]:
-        return {name: code for name, code in discover_scripts()}
+        # Stat the scripts dir instead of re-reading every file per call; the
+        # cache key covers both content changes (mtime) and adds/removals
+        # (the name tuple).
+        paths = [
+            p for p in sorted(SCRIPTS_DIR.glob("*.py")) if not p.name.startswith("_")
+        ]
+        stamp = (
+            max((p.stat().st_mtime for p in paths), default=0.0),
+            tuple(p.name for p in paths),
+        )
+        cached = self._baseline_scripts_cache
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        scripts = {name: code for name, code in discover_scripts()}
+        self._baseline_scripts_cache = (stamp, scripts)
+        return scripts
 
     def list_scripts(self) -> list[dict[str, Any]]:
         baseline = self._baseline_scripts()
@@ -441,6 +669,7 @@ class DailyAlertEngine:
                 setting.updated_at = utc_now()
             session.add(setting)
             session.commit()
+        self._invalidate_scripts_cache()
         return self.get_script(script_name)
 
     def activate_script_revision(
@@ -464,6 +693,7 @@ class DailyAlertEngine:
                 setting.updated_at = utc_now()
             session.add(setting)
             session.commit()
+        self._invalidate_scripts_cache()
         self._invalidate_current_day_run()
         return self.get_script(script_name)
 
@@ -477,14 +707,13 @@ class DailyAlertEngine:
             setting.updated_at = utc_now()
             session.add(setting)
             session.commit()
+        self._invalidate_scripts_cache()
         self._invalidate_current_day_run()
         return self.get_script(script_name)
 
     def generate_script_edit(
         self, script_name: str, instruction: str
     ) -> dict[str, Any]:
-        from .llm_script_edit import edit_script_with_ai
-
         detail = self.get_script(script_name)
         current_code = str(detail["active_code"])
         edited_code = edit_script_with_ai(
@@ -514,8 +743,6 @@ class DailyAlertEngine:
     def compare_script_revision_history(
         self, script_name: str, revision_id: str
     ) -> dict[str, Any]:
-        from .llm_script_edit import validate_sandbox_compatibility
-
         detail = self.get_script(script_name)
         old_code = str(detail["active_code"])
 
@@ -543,9 +770,6 @@ class DailyAlertEngine:
         revision_id: str,
         comparison: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        from .llm_script_edit import validate_sandbox_compatibility
-        from .llm_script_final_check import final_check_script_draft_with_ai
-
         detail = self.get_script(script_name)
         old_code = str(detail["active_code"])
 
@@ -579,6 +803,10 @@ class DailyAlertEngine:
             "retry_instruction": ai_review.get("retry_instruction"),
         }
 
+    # Fan machines out to worker shards only when the fleet is big enough for
+    # the pool overhead to pay off.
+    _PARALLEL_MACHINES_MIN = 16
+
     def _compare_one_day(
         self,
         *,
@@ -588,6 +816,46 @@ class DailyAlertEngine:
         script_name: str,
         old_code: str,
         new_code: str,
+    ) -> tuple[int, int]:
+        if len(machines) >= self._PARALLEL_MACHINES_MIN:
+            shards = min(4, os.cpu_count() or 1)
+            old_day_alerts = 0
+            new_day_alerts = 0
+            with ThreadPoolExecutor(max_workers=shards) as pool:
+                results = pool.map(
+                    lambda shard: self._compare_machines_shard(
+                        day=day,
+                        machines=shard,
+                        location_currency=location_currency,
+                        script_name=script_name,
+                        old_code=old_code,
+                        new_code=new_code,
+                    ),
+                    [machines[i::shards] for i in range(shards)],
+                )
+                for old_n, new_n in results:
+                    old_day_alerts += old_n
+                    new_day_alerts += new_n
+            return old_day_alerts, new_day_alerts
+
+        return self._compare_machines_shard(
+            day=day,
+            machines=machines,
+            location_currency=location_currency,
+            script_name=script_name,
+            old_code=old_code,
+            new_code=new_code,
+        )
+
+    def _compare_machines_shard(
+        self,
+        *,
+        day: date,
+        machines: list[dict[str, Any]],
+        location_currency: dict[int, str],
+        script_name: str,
+        old_code: str,
+        new_code: str,
     ) -> tuple[int, int]:
         old_day_alerts = 0
         new_day_alerts = 0
@@ -630,10 +898,9 @@ class DailyAlertEngine:
         old_code: str,
         new_code: str,
     ) -> dict[str, Any]:
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            start_day = state.start_day
-            end_day = state.current_day
+        state = self._engine_state()
+        start_day = state.start_day
+        end_day = state.current_day
 
         self._ensure_inventory_through_day(target_day=end_day)
         machines = query_all(
@@ -707,7 +974,23 @@ class DailyAlertEngine:
             "changed_days": changed_days,
         }
 
+    def _invalidate_scripts_cache(self) -> None:
+        self._active_scripts_cache = None
+        self._prepared_scripts_cache = None
+
+    def _prepared_scripts(self) -> list[tuple[str, str, str]]:
+        """Active scripts as (name, code, version) with the version hash
+        computed once per script edit rather than once per day run."""
+        if self._prepared_scripts_cache is None:
+            self._prepared_scripts_cache = [
+                (script_name, code, self._sha12(code))
+                for script_name, code in self._active_scripts()
+            ]
+        return self._prepared_scripts_cache
+
     def _active_scripts(self) -> list[tuple[str, str]]:
+        if self._active_scripts_cache is not None:
+            return self._active_scripts_cache
         baseline = self._baseline_scripts()
         script_names = sorted(baseline.keys())
         if not script_names:
@@ -742,6 +1025,7 @@ class DailyAlertEngine:
                 if rev and rev.script_name == script_name:
                     code = rev.code
             scripts.append((script_name, code))
+        self._active_scripts_cache = scripts
         return scripts
 
     def _clear_alerts(self) -> None:
@@ -760,13 +1044,12 @@ class DailyAlertEngine:
             state.updated_at = utc_now()
             session.add(state)
             session.commit()
+        self._state_cache = None
         return self.get_state()
 
     def run_current_day(self) -> RunSummary:
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            run_day = state.current_day
-            next_day = state.current_day + timedelta(days=1)
+        run_day = self._engine_state().current_day
+        next_day = run_day + timedelta(days=1)
 
         summary = self._run_for_day_once(run_day)
 
@@ -784,9 +1067,7 @@ class DailyAlertEngine:
 
     def advance_day(self) -> dict[str, Any]:
         # 1. Run scripts for current day N (idempotent via RunLog guard)
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            run_day = state.current_day
+        run_day = self._engine_state().current_day
 
         summary = self._run_for_day_once(run_day)
 
@@ -807,6 +1088,7 @@ class DailyAlertEngine:
             session.add(state)
             session.commit()
             new_day = state.current_day
+        self._state_cache = None
 
         # 3. Run scripts for the new day so alerts are visible immediately
         summary = self._run_for_day_once(new_day)
@@ -873,40 +1155,54 @@ class DailyAlertEngine:
             if existing_next:
                 return
 
-        to_add: list[InventoryState] = []
-        for mid, model in machine_model_by_id.items():
-            start_rows = session.exec(
-                select(InventoryState)
-                .where(InventoryState.date == run_day)
-                .where(InventoryState.machine_id == mid)
-            ).all()
-            if not start_rows:
+        # One as-of fetch for the whole fleet instead of a SELECT per machine.
+        inventory = self._inventory_asof(day=run_day)
+
+        consumption_by_machine = self._predicted_consumption_for_day_bulk(
+            run_id=run_id, day=run_day
+        )
+
+        now = utc_now()
+        to_add: list[dict[str, Any]] = []
+        for (mid, iid), (qty, unit) in inventory.items():
+            model = machine_model_by_id.get(mid)
+            if model is None:
                 continue
-            consumption = self._predicted_consumption_for_day(
-                run_id=run_id, machine_id=mid, day=run_day
+            used, _unit = consumption_by_machine.get(mid, {}).get(iid, (0.0, unit))
+            next_qty = max(0.0, qty - float(used))
+            if mid in restock_machine_ids:
+                cap = caps_by_model_ing.get((model, iid))
+                if cap is not None and str(cap.get("unit") or "") == unit:
+                    next_qty = float(cap["capacity"])
+            # Storage is sparse: unchanged quantities fall back to the prior
+            # row via _inventory_asof, so don't duplicate them.
+            if next_qty == qty:
+                continue
+            to_add.append(
+                {
+                    "id": str(uuid4()),
+                    "date": next_day,
+                    "machine_id": mid,
+                    "ingredient_id": iid,
+                    "quantity_on_hand": next_qty,
+                    "unit": unit,
+                    "updated_at": now,
+                }
             )
-            for r in start_rows:
-                iid = int(r.ingredient_id)
-                used, _unit = consumption.get(iid, (0.0, str(r.unit)))
-                next_qty = max(0.0, float(r.quantity_on_hand) - float(used))
-                if mid in restock_machine_ids:
-                    cap = caps_by_model_ing.get((model, iid))
-                    if cap is not None and str(cap.get("unit") or "") == str(r.unit):
-                        next_qty = float(cap["capacity"])
-                to_add.append(
-                    InventoryState(
-                        date=next_day,
-                        machine_id=mid,
-                        ingredient_id=iid,
-                        quantity_on_hand=next_qty,
-                        unit=str(r.unit),
-                    )
-                )
 
-        session.add_all(to_add)
+        # Bypass per-object ORM flush bookkeeping; chunk to bound memory.
+        for start in range(0, len(to_add), 10_000):
+            session.bulk_insert_mappings(InventoryState, to_add[start : start + 10_000])
         session.commit()
 
     def _ensure_inventory_through_day(self, *, target_day: date) -> None:
+        # With sparse rows, MAX(date) alone can lag the day actually
+        # materialized (quiet days write nothing), so track progress in-memory.
+        if (
+            self._inventory_through is not None
+            and self._inventory_through >= target_day
+        ):
+            return
         self._ensure_inventory_seed()
         with Session(self.sql_engine) as session:
             latest = session.exec(
@@ -918,82 +1214,195 @@ class DailyAlertEngine:
             if latest is None:
                 return
             latest_day = latest
-            for _ in count():
-                if latest_day >= target_day:
-                    break
-                next_day = latest_day + timedelta(days=1)
-                self._persist_next_day_inventory(
-                    session=session,
-                    run_id=str(self._run_id or ""),
-                    run_day=latest_day,
-                    next_day=next_day,
-                    overwrite=False,
+            if self._inventory_through is not None:
+                latest_day = max(latest_day, self._inventory_through)
+            if latest_day >= target_day:
+                self._inventory_through = latest_day
+                return
+
+            # Catch up all missing days in one pass: fetch the shared facts and
+            # restock actions once, then roll inventory forward in memory
+            # instead of re-querying InventoryState per day.
+            run_id = str(self._run_id or "")
+            caps_by_model_ing: dict[tuple[str, int], dict[str, Any]] = {
+                (str(r["machine_model"]), int(r["ingredient_id"])): r
+                for r in self._facts_capacities()
+            }
+            machine_model_by_id = {
+                int(m["machine_id"]): str(m["machine_model"])
+                for m in self._facts_machines()
+            }
+
+            actions = session.exec(
+                select(ManagerAction)
+                .where(ManagerAction.effective_date > latest_day)
+                .where(ManagerAction.effective_date <= target_day)
+                .where(ManagerAction.action_type == str(ActionType.RESTOCK_MACHINE))
+            ).all()
+            restock_by_date: dict[date, set[int]] = defaultdict(set)
+            for a in actions:
+                restock_by_date[a.effective_date].add(int(a.machine_id))
+
+            rolling = self._inventory_asof(day=latest_day)
+
+            now = utc_now()
+            to_add: list[dict[str, Any]] = []
+            day = latest_day
+            while day < target_day:
+                next_day = day + timedelta(days=1)
+                consumption_by_machine = (
+                    self._predicted_consumption_for_day_bulk(run_id=run_id, day=day)
+                    if self._run_id is not None
+                    else {}
+                )
+                restock_machine_ids = restock_by_date.get(next_day, set())
+                for (mid, iid), (qty, unit) in rolling.items():
+                    used, _unit = consumption_by_machine.get(mid, {}).get(
+                        iid, (0.0, unit)
+                    )
+                    next_qty = max(0.0, qty - float(used))
+                    if mid in restock_machine_ids:
+                        cap = caps_by_model_ing.get(
+                            (machine_model_by_id.get(mid, ""), iid)
+                        )
+                        if cap is not None and str(cap.get("unit") or "") == unit:
+                            next_qty = float(cap["capacity"])
+                    # Sparse storage: only record days where the quantity moves.
+                    if next_qty == qty:
+                        continue
+                    rolling[(mid, iid)] = (next_qty, unit)
+                    to_add.append(
+                        {
+                            "id": str(uuid4()),
+                            "date": next_day,
+                            "machine_id": mid,
+                            "ingredient_id": iid,
+                            "quantity_on_hand": next_qty,
+                            "unit": unit,
+                            "updated_at": now,
+                        }
+                    )
+                day = next_day
+
+            for start in range(0, len(to_add), 10_000):
+                session.bulk_insert_mappings(
+                    InventoryState, to_add[start : start + 10_000]
                 )
-                latest_day = next_day
+            session.commit()
+            self._inventory_through = target_day
 
     def run_for_day(self, run_day: date) -> RunSummary:
         self._ensure_inventory_through_day(target_day=run_day)
-        machine_rows = query_all(
-            self.dbs.facts_db,
-            """
-            SELECT id AS machine_id, location_id
-            FROM machine
-            ORDER BY location_id, id
-            """,
-            readonly=True,
-        )
+        # The memoized facts rows carry (machine_id, location_id) in the same
+        # (location_id, id) order; no need for a fresh machine query per day.
+        machine_rows = self._facts_machines()
 
-        scripts = self._active_scripts()
+        prepared_scripts = self._prepared_scripts()
         location_currency = self._location_currency()
+        inventory_overrides = self._inventory_overrides_for_day(run_day=run_day)
+        active_suppressions = self._active_suppressions()
 
-        alerts_created = 0
-        script_count = 0
-        for row in machine_rows:
+        # Build every machine context once, then iterate script-major so each
+        # script's setup is amortized across the whole fleet. The empty
+        # override is read-only downstream, so one shared instance (with the
+        # day formatted once) serves every machine without inventory rows.
+        empty_override = {"snapshot_date": run_day.isoformat(), "rows": []}
+
+        def _build_context(row: dict[str, Any]) -> dict[str, Any]:
             location_id = int(row["location_id"])
             machine_id = int(row["machine_id"])
-            currency = location_currency.get(location_id, "USD")
-
-            context = build_script_context(
+            return build_script_context(
                 dbs=self.dbs,
                 as_of_date=run_day,
                 location_id=location_id,
                 machine_id=machine_id,
-                currency=currency,
+                currency=location_currency.get(location_id, "USD"),
                 state_db=self.state_db,
-                inventory_override=self._inventory_override_for_machine(
-                    run_day=run_day, machine_id=machine_id
-                ),
+                inventory_override=inventory_overrides.get(machine_id, empty_override),
             )
 
-            for script_name, code in scripts:
-                script_count += 1
-                script_version = hashlib.sha256(code.encode()).hexdigest()[:12]
+        # Context building is dominated by read-only SQLite queries, which
+        # release the GIL; threads overlap that I/O across machines (each
+        # query_all call opens its own connection, so no sharing issues).
+        if len(machine_rows) >= self._PARALLEL_MACHINES_MIN:
+            with ThreadPoolExecutor(
+                max_workers=min(8, len(machine_rows))
+            ) as context_pool:
+                contexts = list(context_pool.map(_build_context, machine_rows))
+        else:
+            contexts = [_build_context(row) for row in machine_rows]
+
+        # Script execution is CPU-bound and independent per machine: fan the
+        # prebuilt (picklable) contexts out to worker processes for large
+        # fleets, then persist the returned alerts serially in this process.
+        if len(contexts) >= self._PARALLEL_MACHINES_MIN:
+            with ProcessPoolExecutor(
+                initializer=_init_script_worker, initargs=(prepared_scripts,)
+            ) as pool:
+                results = list(
+                    pool.map(_execute_scripts_in_worker, contexts, chunksize=8)
+                )
+        else:
+            results = [
+                _execute_scripts_for_machine(prepared_scripts, context)
+                for context in contexts
+            ]
 
-                try:
-                    emitted = run_script(
-                        script_name=script_name,
-                        code=code,
-                        context=context,
-                    )
-                except ScriptExecutionError as exc:
-                    logger.error("{} failed: {}", script_name, exc)
-                    continue
+        alerts_created = 0
+        script_count = 0
+        with Session(self.sql_engine) as session:
+            # Preload every OPEN alert once so dedup is an in-memory dict hit
+            # instead of a SELECT per emitted alert. Only the two key columns
+            # are fetched; no ORM rows are materialized for the probe.
+            open_alerts: dict[str, str] = {}
+            for fp, alert_id in session.exec(
+                select(Alert.fingerprint, Alert.alert_id)
+                .where(Alert.status == "OPEN")
+                .order_by(Alert.created_at)
+            ):
+                open_alerts[fp] = alert_id
+
+            # New rows are buffered as mappings and land as one multi-row
+            # INSERT per commit batch rather than an ORM flush per alert.
+            pending_inserts: dict[str, dict[str, Any]] = {}
 
-                for alert_payload in emitted:
+            def _flush_pending() -> None:
+                if pending_inserts:
+                    session.bulk_insert_mappings(Alert, list(pending_inserts.values()))
+                    pending_inserts.clear()
+
+            for machine_script_count, emitted, errors in results:
+                script_count += machine_script_count
+                for message in errors:
+                    logger.error("{}", message)
+
+                for script_name, script_version, alert_payload in emitted:
                     try:
                         parsed = AlertPayload.model_validate(alert_payload)
                     except ValidationError as exc:
                         logger.error(
-                            "Invalid alert payload script={} error={}", script_name, exc
+                            "Invalid alert payload script={} error={}",
+                            script_name,
+                            exc,
                         )
                         continue
                     if self._persist_alert(
+                        session=session,
                         run_day=run_day,
                         script_name=script_name,
                         script_version=script_version,
                         payload=parsed,
+                        active_suppressions=active_suppressions,
+                        open_alerts=open_alerts,
+                        pending_inserts=pending_inserts,
                     ):
                         alerts_created += 1
+                        # Commit in batches to bound transaction size.
+                        if alerts_created % 500 == 0:
+                            _flush_pending()
+                            session.commit()
+            _flush_pending()
+            session.commit()
 
         logger.info(
             "Daily run complete day={} scripts={} alerts={}",
@@ -1007,16 +1416,101 @@ class DailyAlertEngine:
             emitted_alerts=alerts_created,
         )
 
+    def _inventory_asof(
+        self, *, day: date, machine_id: int | None = None
+    ) -> dict[tuple[int, int], tuple[float, str]]:
+        """Latest on-hand quantity per (machine, ingredient) on or before day.
+
+        Inventory rows are stored sparsely (only days where a quantity
+        changed), so readers resolve each pair to its most recent row.
+        """
+        query = """
+            SELECT i.machine_id AS machine_id,
+                   i.ingredient_id AS ingredient_id,
+                   i.quantity_on_hand AS quantity_on_hand,
+                   i.unit AS unit
+            FROM inventory_state i
+            JOIN (
+                SELECT machine_id, ingredient_id, MAX(date) AS date
+                FROM inventory_state
+                WHERE date <= ?{machine_clause}
+                GROUP BY machine_id, ingredient_id
+            ) latest ON latest.machine_id = i.machine_id
+                    AND latest.ingredient_id = i.ingredient_id
+                    AND latest.date = i.date
+        """
+        params: tuple[Any, ...] = (day.isoformat(),)
+        machine_clause = ""
+        if machine_id is not None:
+            machine_clause = " AND machine_id = ?"
+            params = (day.isoformat(), machine_id)
+        rows = query_iter(
+            self.state_db, query.format(machine_clause=machine_clause), params
+        )
+        return {
+            (int(r["machine_id"]), int(r["ingredient_id"])): (
+                float(r["quantity_on_hand"]),
+                str(r["unit"]),
+            )
+            for r in rows
+        }
+
+    def _inventory_overrides_for_day(self, *, run_day: date) -> dict[int, dict[str, Any]]:
+        """Build the inventory override payload for every machine in one pass.
+
+        Same shape per machine as _inventory_override_for_machine, but with a
+        single InventoryState fetch and shared capacity lookups instead of one
+        query set per machine.
+        """
+        self._ensure_inventory_through_day(target_day=run_day)
+        inventory = self._inventory_asof(day=run_day)
+        rows_by_mid: dict[int, list[tuple[int, float, str]]] = defaultdict(list)
+        for (mid, iid), (qty, unit) in inventory.items():
+            rows_by_mid[mid].append((iid, qty, unit))
+
+        model_by_mid = {
+            int(m["machine_id"]): str(m["machine_model"])
+            for m in self._facts_machines()
+        }
+        caps_by_model: dict[str, dict[int, dict[str, Any]]] = {}
+        for cap in self._facts_capacities():
+            caps_by_model.setdefault(str(cap["machine_model"]), {})[
+                int(cap["ingredient_id"])
+            ] = cap
+
+        snapshot_date = run_day.isoformat()
+        overrides: dict[int, dict[str, Any]] = {}
+        for mid, model in model_by_mid.items():
+            caps_by_ing = caps_by_model.get(model, {})
+            out_rows: list[dict[str, Any]] = []
+            for iid, qty, unit in rows_by_mid.get(mid, []):
+                cap = caps_by_ing.get(iid)
+                out_rows.append(
+                    {
+                        "snapshot_date": snapshot_date,
+                        "ingredient_id": iid,
+                        "ingredient_name": cap.get("ingredient_name") if cap else None,
+                        "quantity_on_hand": qty,
+                        "unit": unit,
+                        "capacity": float(cap["capacity"])
+                        if cap and cap.get("capacity") is not None
+                        else None,
+                        "capacity_unit": cap.get("unit") if cap else None,
+                    }
+                )
+            overrides[mid] = {"snapshot_date": snapshot_date, "rows": out_rows}
+        return overrides
+
     def _inventory_override_for_machine(
         self, *, run_day: date, machine_id: int
     ) -> dict[str, Any]:
-        self._ensure_inventory_through_day(target_day=run_day)
-        with Session(self.sql_engine) as session:
-            rows = session.exec(
-                select(InventoryState)
-                .where(InventoryState.date == run_day)
-                .where(InventoryState.machine_id == machine_id)
-            ).all()
+        """Build one machine's inventory override payload.
+
+        Callers are responsible for having run _ensure_inventory_through_day
+        for run_day first; repeating that check here cost a Session plus a
+        MAX(date) probe per machine even when it was a no-op.
+        """
+        inventory = self._inventory_asof(day=run_day, machine_id=machine_id)
 
         machine_row = query_one(
             self.dbs.facts_db,
@@ -1033,15 +1527,15 @@ class DailyAlertEngine:
         }
 
         out_rows: list[dict[str, Any]] = []
-        for r in rows:
-            cap = caps_by_ing.get(int(r.ingredient_id))
+        for (_mid, iid), (qty, unit) in inventory.items():
+            cap = caps_by_ing.get(iid)
             out_rows.append(
                 {
                     "snapshot_date": run_day.isoformat(),
-                    "ingredient_id": int(r.ingredient_id),
+                    "ingredient_id": iid,
                     "ingredient_name": cap.get("ingredient_name") if cap else None,
-                    "quantity_on_hand": float(r.quantity_on_hand),
-                    "unit": str(r.unit),
+                    "quantity_on_hand": qty,
+                    "unit": unit,
                     "capacity": float(cap["capacity"])
                     if cap and cap.get("capacity") is not None
                     else None,
@@ -1054,115 +1548,177 @@ class DailyAlertEngine:
     def _persist_alert(
         self,
         *,
+        session: Session,
         run_day: date,
         script_name: str,
         script_version: str,
         payload: AlertPayload,
+        active_suppressions: set[tuple[int, int | None, str]] | None = None,
+        open_alerts: dict[str, str] | None = None,
+        pending_inserts: dict[str, dict[str, Any]] | None = None,
     ) -> bool:
+        """Persist one alert into the caller's session without committing.
+
+        The caller owns the transaction; run_for_day batches commits across
+        many alerts instead of paying a Session + commit per alert. When
+        open_alerts (a fingerprint-keyed snapshot of OPEN rows) is supplied,
+        dedup resolves in memory with no per-alert SELECT. When
+        pending_inserts is supplied, new rows are collected there (keyed by
+        alert_id) for the caller to bulk-insert at its commit points instead
+        of going through ORM flushes one at a time.
+        """
         location_id = int(payload.location_id)
         machine_id = payload.machine_id
         product_id = payload.product_id
         ingredient_id = payload.ingredient_id
         alert_type = str(payload.alert_type)
 
-        if self._is_suppressed(
-            location_id=location_id,
-            machine_id=int(machine_id) if machine_id is not None else None,
+        suppression_key = (
+            location_id,
+            int(machine_id) if machine_id is not None else None,
+            alert_type,
+        )
+        if active_suppressions is not None:
+            if suppression_key in active_suppressions:
+                return False
+        elif self._is_suppressed(
+            location_id=suppression_key[0],
+            machine_id=suppression_key[1],
             alert_type=alert_type,
         ):
             return False
 
-        identity = {
-            "script_name": script_name,
-            "alert_type": alert_type,
-            "location_id": location_id,
-            "machine_id": machine_id,
-            "product_id": product_id,
-            "ingredient_id": ingredient_id,
-        }
-        fingerprint = hashlib.sha256(
-            json.dumps(identity, sort_keys=True).encode("utf-8")
+        # The identity schema is fixed, so canonical ordering is free: hash a
+        # delimited field string directly instead of serializing a sorted
+        # dict per alert. blake2b is the fastest stdlib hash on short inputs;
+        # these digests are dedup keys, not security boundaries.
+        # digest_size=16 (128 bits) is far beyond collision risk for dedup
+        # keys and quarters the text stored per row in the fingerprint
+        # column and its partial index versus the 64-byte default.
+        fingerprint = hashlib.blake2b(
+            f"{script_name}|{alert_type}|{location_id}|{machine_id}"
+            f"|{product_id}|{ingredient_id}".encode(),
+            digest_size=16,
         ).hexdigest()
-        evidence_json = json.dumps(payload.evidence, sort_keys=True, default=str)
-        evidence_hash = hashlib.sha256(evidence_json.encode("utf-8")).hexdigest()
+        # OPT_NON_STR_KEYS matches stdlib json's key coercion: evidence comes
+        # from sandbox scripts, which may nest int-keyed dicts that pydantic's
+        # top-level dict[str, Any] validation does not catch.
+        evidence_blob = orjson.dumps(
+            payload.evidence,
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+        evidence_json = evidence_blob.decode("utf-8")
+        evidence_hash = hashlib.blake2b(evidence_blob, digest_size=16).hexdigest()
+        recommended_actions_json = orjson.dumps(
+            [a.model_dump(mode="json") for a in payload.recommended_actions],
+            option=orjson.OPT_SORT_KEYS,
+        ).decode("utf-8")
         now = utc_now()
 
-        with Session(self.sql_engine) as session:
-            existing_open = session.exec(
-                select(Alert)
+        # Dedup probe needs only the current alert's id; skip ORM row
+        # materialization entirely.
+        if open_alerts is not None:
+            current_id = open_alerts.get(fingerprint)
+        else:
+            current_id = session.exec(
+                select(Alert.alert_id)
                 .where(Alert.fingerprint == fingerprint)
                 .where(Alert.status == "OPEN")
                 .order_by(desc(Alert.created_at))
-            ).all()
+                .limit(1)
+            ).first()
 
-            if existing_open:
-                current = existing_open[0]
-                current.created_at = now
-                current.run_date = run_day
-                current.script_name = script_name
-                current.script_version = script_version
-                current.fingerprint = fingerprint
-                current.evidence_hash = evidence_hash
-                current.severity = str(payload.severity)
-                current.alert_type = alert_type
-                current.location_id = location_id
-                current.machine_id = int(machine_id) if machine_id is not None else None
-                current.product_id = int(product_id) if product_id is not None else None
-                current.ingredient_id = (
-                    int(ingredient_id) if ingredient_id is not None else None
-                )
-                current.title = str(payload.title)
-                current.summary = str(payload.summary)
-                current.evidence_json = evidence_json
-                current.recommended_actions_json = json.dumps(
-                    [a.model_dump(mode="json") for a in payload.recommended_actions],
-                    sort_keys=True,
-                )
-                current.status = "OPEN"
-                current.snoozed_until = None
-                current.decision = None
-                current.decision_note = None
-                current.decided_at = None
-                current.feedback_loop_id = None
-                session.add(current)
-
-                for prior in existing_open[1:]:
-                    prior.status = "REPLACED"
-                    prior.decision = "AUTO_REPLACED"
-                    prior.decision_note = (
-                        "Superseded by a newer alert with the same identity."
-                    )
-                    prior.decided_at = now
-                    session.add(prior)
+        values: dict[str, Any] = {
+            "created_at": now,
+            "run_date": run_day,
+            "script_name": script_name,
+            "script_version": script_version,
+            "fingerprint": fingerprint,
+            "evidence_hash": evidence_hash,
+            "severity": str(payload.severity),
+            "alert_type": alert_type,
+            "location_id": location_id,
+            "machine_id": int(machine_id) if machine_id is not None else None,
+            "product_id": int(product_id) if product_id is not None else None,
+            "ingredient_id": int(ingredient_id) if ingredient_id is not None else None,
+            "title": str(payload.title),
+            "summary": str(payload.summary),
+            "evidence_json": evidence_json,
+            "recommended_actions_json": recommended_actions_json,
+            "status": "OPEN",
+            "snoozed_until": None,
+            "decision": None,
+            "decision_note": None,
+            "decided_at": None,
+            "feedback_loop_id": None,
+        }
 
-                session.commit()
+        if current_id is not None:
+            if pending_inserts is not None and current_id in pending_inserts:
+                # The current copy is still a buffered mapping from earlier in
+                # this run, so update it in place; there is no DB row to touch
+                # and (by the open_alerts invariant) no other OPEN copies.
+                pending_inserts[current_id].update(values)
+                self._invalidate_related_alerts(script_name)
                 return True
 
-            alert = Alert(
-                run_date=run_day,
-                script_name=script_name,
-                script_version=script_version,
-                fingerprint=fingerprint,
-                evidence_hash=evidence_hash,
-                severity=str(payload.severity),
-                alert_type=alert_type,
-                location_id=location_id,
-                machine_id=int(machine_id) if machine_id is not None else None,
-                product_id=int(product_id) if product_id is not None else None,
-                ingredient_id=int(ingredient_id) if ingredient_id is not None else None,
-                title=str(payload.title),
-                summary=str(payload.summary),
-                evidence_json=evidence_json,
-                recommended_actions_json=json.dumps(
-                    [a.model_dump(mode="json") for a in payload.recommended_actions],
-                    sort_keys=True,
-                ),
-                status="OPEN",
+            session.exec(
+                update(Alert).where(Alert.alert_id == current_id).values(**values)
             )
-            session.add(alert)
-            session.commit()
+
+            # Retire any other open copies in one statement instead of an
+            # ORM flush per superseded row.
+            session.exec(
+                update(Alert)
+                .where(Alert.fingerprint == fingerprint)
+                .where(Alert.status == "OPEN")
+                .where(Alert.alert_id != current_id)
+                .values(
+                    status="REPLACED",
+                    decision="AUTO_REPLACED",
+                    decision_note=(
+                        "Superseded by a newer alert with the same identity."
+                    ),
+                    decided_at=now,
+                )
+            )
+            self._invalidate_related_alerts(script_name)
+            return True
+
+        if pending_inserts is not None:
+            new_id = str(uuid4())
+            pending_inserts[new_id] = {"alert_id": new_id, **values}
+            if open_alerts is not None:
+                open_alerts[fingerprint] = new_id
+            self._invalidate_related_alerts(script_name)
+            return True
+
+        alert = Alert(**values)
+        session.add(alert)
+        if open_alerts is not None:
+            open_alerts[fingerprint] = alert.alert_id
+        self._invalidate_related_alerts(script_name)
         return True
 
+    def _active_suppressions(self) -> set[tuple[int, int | None, str]]:
+        """Snapshot all currently-active suppression keys in one query."""
+        # Raw read: this runs once per backtest day and needs no Session
+        # lifecycle. DateTime columns are stored as "YYYY-MM-DD HH:MM:SS.ffffff"
+        # text, so the lexicographic comparison matches datetime order.
+        rows = query_all(
+            self.state_db,
+            """
+            SELECT location_id, machine_id, alert_type
+            FROM alert_suppression
+            WHERE suppressed_until > ?
+            """,
+            (utc_now().strftime("%Y-%m-%d %H:%M:%S.%f"),),
+        )
+        return {
+            (r["location_id"], r["machine_id"], r["alert_type"]) for r in rows
+        }
+
     def _is_suppressed(
         self, *, location_id: int, machine_id: int | None, alert_type: str
     ) -> bool:
@@ -1188,11 +1744,14 @@ class DailyAlertEngine:
     ) -> datetime:
         now = utc_now()
         until = now + timedelta(days=days)
+        # Only existence and the current deadline are needed, so skip full-row
+        # materialization and update by primary key.
         existing = session.exec(
-            select(AlertSuppression)
+            select(AlertSuppression.id, AlertSuppression.suppressed_until)
             .where(AlertSuppression.location_id == location_id)
             .where(AlertSuppression.machine_id == machine_id)
             .where(AlertSuppression.alert_type == alert_type)
+            .limit(1)
         ).first()
         if existing is None:
             session.add(
@@ -1206,10 +1765,13 @@ class DailyAlertEngine:
                 )
             )
         else:
-            existing.suppressed_until = max(existing.suppressed_until, until)
-            existing.updated_at = now
-            session.add(existing)
-            until = existing.suppressed_until
+            suppression_id, existing_until = existing
+            until = max(existing_until, until)
+            session.exec(
+                update(AlertSuppression)
+                .where(AlertSuppression.id == suppression_id)
+                .values(suppressed_until=until, updated_at=now)
+            )
         return until
 
     def list_alerts(
@@ -1219,7 +1781,16 @@ class DailyAlertEngine:
         location_id: int | None = None,
         include_snoozed: bool = False,
         limit: int = 200,
+        fields: set[str] | None = None,
     ) -> list[dict[str, Any]]:
+        """List alerts, optionally projected to a subset of columns.
+
+        When `fields` is given only those columns are selected, and the
+        evidence/recommended_actions JSON blobs are fetched and parsed only
+        if their columns are requested — list views that just show titles
+        and severities skip the JSON work entirely.
+        """
+
         def normalize_iso_dt(value: Any) -> Any:
             if value is None:
                 return None
@@ -1229,17 +1800,21 @@ class DailyAlertEngine:
                 return value
 
             raw = value.strip()
-            if not raw:
-                return value
-            candidate = raw.replace(" ", "T", 1)
-            try:
-                parsed = datetime.fromisoformat(candidate)
-            except ValueError:
+            if not _ISO_DT.match(raw):
                 return value
+            parsed = datetime.fromisoformat(raw.replace(" ", "T", 1))
             return parsed.isoformat(timespec="seconds")
 
-        query = """
-        SELECT *
+        if fields:
+            unknown = fields - set(Alert.__table__.columns.keys())
+            if unknown:
+                raise ValueError(f"Unknown alert fields: {sorted(unknown)}")
+            select_list = ", ".join(sorted(fields))
+        else:
+            select_list = "*"
+
+        query = f"""
+        SELECT {select_list}
         FROM alert
         WHERE 1 = 1
         """
@@ -1262,22 +1837,75 @@ class DailyAlertEngine:
             for key in ("created_at", "snoozed_until", "decided_at"):
                 if key in row:
                     row[key] = normalize_iso_dt(row.get(key))
-            row["evidence"] = json.loads(row["evidence_json"])
-            row["recommended_actions"] = json.loads(row["recommended_actions_json"])
+            if "evidence_json" in row:
+                row["evidence"] = orjson.loads(row["evidence_json"])
+            if "recommended_actions_json" in row:
+                row["recommended_actions"] = orjson.loads(
+                    row["recommended_actions_json"]
+                )
         return rows
 
+    def list_alerts_summary(
+        self,
+        *,
+        status: str | None = None,
+        location_id: int | None = None,
+        include_snoozed: bool = False,
+        limit: int = 200,
+    ) -> list[dict[str, Any]]:
+        """List alerts without their JSON payloads (for list views).
+
+        Unlike list_alerts, this never materializes evidence_json or
+        recommended_actions_json in Python; the only JSON work happens
+        server-side via sqlite's json_array_length.
+        """
+        query = """
+        SELECT
+            alert_id,
+            created_at,
+            run_date,
+            script_name,
+            script_version,
+            severity,
+            alert_type,
+            location_id,
+            machine_id,
+            product_id,
+            ingredient_id,
+            title,
+            summary,
+            status,
+            snoozed_until,
+            json_array_length(recommended_actions_json) AS recommended_action_count
+        FROM alert
+        WHERE 1 = 1
+        """
+        params: list[Any] = []
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        elif not include_snoozed:
+            query += " AND status = 'OPEN'"
+
+        if location_id is not None:
+            query += " AND location_id = ?"
+            params.append(location_id)
+
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+
+        return query_all(self.state_db, query, tuple(params))
+
     def accept_alert(
         self, alert_id: str, decision_note: str | None = None
     ) -> dict[str, Any]:
         with Session(self.sql_engine) as session:
-            alert = session.exec(
-                select(Alert).where(Alert.alert_id == alert_id)
-            ).first()
+            # PK lookup via the identity map instead of a full select().
+            alert = session.get(Alert, alert_id)
             if alert is None:
                 raise ValueError(f"Alert {alert_id} not found")
 
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            effective_date = state.current_day + timedelta(days=1)
+            effective_date = self._engine_state().current_day + timedelta(days=1)
             actionable_types = {
                 str(ActionType.RESTOCK_MACHINE),
                 str(ActionType.ORDER_INGREDIENTS),
@@ -1381,14 +2009,17 @@ class DailyAlertEngine:
             alert.decision = "ACCEPT_ACTION"
             alert.decision_note = decision_note
             alert.decided_at = utc_now()
-            session.add(alert)
-            session.commit()
-            session.refresh(alert)
+            # Capture before commit: every returned field was set locally, so a
+            # refresh (and the attribute expiry it works around) is pure cost.
             result: dict[str, Any] = {
                 "alert_id": alert.alert_id,
                 "status": alert.status,
                 "decision": alert.decision,
             }
+            script_name = alert.script_name
+            session.add(alert)
+            session.commit()
+            self._invalidate_related_alerts(script_name)
             if manager_actions:
                 result["manager_actions"] = manager_actions
                 restock_actions = [
@@ -1406,9 +2037,7 @@ class DailyAlertEngine:
 
     def snooze_alert(self, alert_id: str, days: int) -> dict[str, Any]:
         with Session(self.sql_engine) as session:
-            alert = session.exec(
-                select(Alert).where(Alert.alert_id == alert_id)
-            ).first()
+            alert = session.get(Alert, alert_id)
             if alert is None:
                 raise ValueError(f"Alert {alert_id} not found")
 
@@ -1426,77 +2055,108 @@ class DailyAlertEngine:
             alert.snoozed_until = suppressed_until
             alert.decision = "SUPPRESS"
             alert.decided_at = utc_now()
-            session.add(alert)
-            session.commit()
-            session.refresh(alert)
-            return {
+            result = {
                 "alert_id": alert.alert_id,
                 "status": alert.status,
-                "snoozed_until": alert.snoozed_until.isoformat(timespec="seconds"),
+                "snoozed_until": suppressed_until.isoformat(timespec="seconds"),
             }
+            script_name = alert.script_name
+            session.add(alert)
+            session.commit()
+            self._invalidate_related_alerts(script_name)
+            return result
+
+    # Reviewing several alerts from the same script back to back is a common
+    # UI flow; the related-alerts context barely changes within a minute, so
+    # memoize it per script instead of re-scanning OPEN alerts each call.
+    _RELATED_ALERTS_TTL_SECONDS = 60.0
+
+    def _related_open_alerts(
+        self, session: Session, script_name: str
+    ) -> list[dict[str, Any]]:
+        cached = self._related_alerts_cache.get(script_name)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < self._RELATED_ALERTS_TTL_SECONDS
+        ):
+            return cached[1]
+        related = session.exec(
+            select(Alert)
+            .where(Alert.script_name == script_name)
+            .where(Alert.status == "OPEN")
+            .order_by(desc(Alert.created_at))
+            .limit(20)
+        ).all()
+        payloads = [
+            {
+                "alert_id": item.alert_id,
+                "run_date": item.run_date.isoformat(),
+                "summary": item.summary,
+            }
+            for item in related
+        ]
+        self._related_alerts_cache[script_name] = (time.monotonic(), payloads)
+        return payloads
+
+    def _invalidate_related_alerts(self, script_name: str) -> None:
+        """Drop the memoized related-alerts list after a write touches it."""
+        self._related_alerts_cache.pop(script_name, None)
 
     def review_alert(
         self, alert_id: str, manager_note: str | None = None
     ) -> dict[str, Any]:
         with Session(self.sql_engine) as session:
-            alert = session.exec(
-                select(Alert).where(Alert.alert_id == alert_id)
-            ).first()
+            alert = session.get(Alert, alert_id)
             if alert is None:
                 raise ValueError(f"Alert {alert_id} not found")
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            current_sim_date = state.current_day.isoformat()
+            current_day = self._engine_state().current_day
 
-            related = session.exec(
-                select(Alert)
-                .where(Alert.script_name == alert.script_name)
-                .where(Alert.status == "OPEN")
-                .order_by(desc(Alert.created_at))
-                .limit(20)
-            ).all()
+            script_name = alert.script_name
+            machine_id = alert.machine_id
+            related_payloads = self._related_open_alerts(session, script_name)
 
             payload = {
                 "alert_id": alert.alert_id,
-                "script_name": alert.script_name,
+                "script_name": script_name,
                 "alert_type": alert.alert_type,
                 "location_id": alert.location_id,
-                "machine_id": alert.machine_id,
-                "current_date": current_sim_date,
+                "machine_id": machine_id,
+                "current_date": current_day.isoformat(),
                 "run_date": alert.run_date.isoformat(),
                 "evidence": json.loads(alert.evidence_json),
             }
 
-            if alert.machine_id is not None:
-                inv = self._inventory_override_for_machine(
-                    run_day=state.current_day, machine_id=alert.machine_id
-                )
-                payload["inventory_snapshot"] = inv.get("rows", [])
-
-            related_payloads = [
-                {
-                    "alert_id": item.alert_id,
-                    "run_date": item.run_date.isoformat(),
-                    "summary": item.summary,
-                }
-                for item in related
-            ]
-            review = review_alert_with_ai(
-                alert=payload,
-                related_open_alerts=related_payloads,
-                manager_note=manager_note,
+        # The session is closed here on purpose: the LLM call below takes
+        # seconds, and holding a pooled connection idle for that long starves
+        # concurrent readers.
+        if machine_id is not None:
+            self._ensure_inventory_through_day(target_day=current_day)
+            inv = self._inventory_override_for_machine(
+                run_day=current_day, machine_id=machine_id
             )
+            payload["inventory_snapshot"] = inv.get("rows", [])
+
+        review = review_alert_with_ai(
+            alert=payload,
+            related_open_alerts=related_payloads,
+            manager_note=manager_note,
+        )
 
-            if review.get("optional_script_change"):
-                known_scripts = {s["script_name"] for s in self.list_scripts()}
-                suggested = review["optional_script_change"]["script_name"]
-                if suggested not in known_scripts:
-                    review["optional_script_change"]["script_name"] = alert.script_name
+        if review.get("optional_script_change"):
+            known_scripts = {s["script_name"] for s in self.list_scripts()}
+            suggested = review["optional_script_change"]["script_name"]
+            if suggested not in known_scripts:
+                review["optional_script_change"]["script_name"] = script_name
 
-            alert.feedback_loop_id = review["feedback_loop_id"]
-            session.add(alert)
+        with Session(self.sql_engine) as session:
+            session.exec(
+                update(Alert)
+                .where(Alert.alert_id == alert_id)
+                .values(feedback_loop_id=review["feedback_loop_id"])
+            )
             session.commit()
 
-            return review
+        return review
 
     async def review_alert_async(
         self, alert_id: str, manager_note: str | None = None
@@ -1509,10 +2169,7 @@ class DailyAlertEngine:
     def dashboard_summary(
         self, *, days: int = 14, location_id: int | None = None
     ) -> dict[str, Any]:
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            end_day = state.current_day
-
+        end_day = self._engine_state().current_day
         start_day = end_day - timedelta(days=max(1, days) - 1)
         params: list[Any] = [start_day.isoformat(), end_day.isoformat()]
         location_clause = ""
@@ -1520,37 +2177,56 @@ class DailyAlertEngine:
             location_clause = " AND t.location_id = ?"
             params.append(location_id)
 
-        revenue_rows = query_all(
+        # Both revenue aggregations share the same filter, so fetch them in one
+        # roundtrip via UNION ALL (SQLite has no GROUPING SETS) and split on
+        # the grouping tag.
+        combined_rows = query_all(
             self.dbs.observed_db,
             f"""
-            SELECT t.location_id,
+            SELECT 'daily' AS grp,
+                   t.location_id,
                    t.date,
+                   NULL AS machine_id,
                    ROUND(SUM(t.amount), 2) AS revenue,
                    COUNT(*) AS tx_count
             FROM "transaction" t
             WHERE t.date BETWEEN ? AND ? {location_clause}
             GROUP BY t.location_id, t.date
-            ORDER BY t.location_id, t.date
-            """,
-            tuple(params),
-            readonly=True,
-        )
-
-        machine_revenue_rows = query_all(
-            self.dbs.observed_db,
-            f"""
-            SELECT t.location_id,
+            UNION ALL
+            SELECT 'machine' AS grp,
+                   t.location_id,
+                   NULL AS date,
                    t.machine_id,
                    ROUND(SUM(t.amount), 2) AS revenue,
                    COUNT(*) AS tx_count
             FROM "transaction" t
             WHERE t.date BETWEEN ? AND ? {location_clause}
             GROUP BY t.location_id, t.machine_id
-            ORDER BY t.location_id, t.machine_id
+            ORDER BY grp, t.location_id, t.date, machine_id
             """,
-            tuple(params),
+            tuple(params) + tuple(params),
             readonly=True,
         )
+        revenue_rows = [
+            {
+                "location_id": r["location_id"],
+                "date": r["date"],
+                "revenue": r["revenue"],
+                "tx_count": r["tx_count"],
+            }
+            for r in combined_rows
+            if r["grp"] == "daily"
+        ]
+        machine_revenue_rows = [
+            {
+                "location_id": r["location_id"],
+                "machine_id": r["machine_id"],
+                "revenue": r["revenue"],
+                "tx_count": r["tx_count"],
+            }
+            for r in combined_rows
+            if r["grp"] == "machine"
+        ]
 
         alert_rows = query_all(
             self.state_db,
@@ -1576,10 +2252,7 @@ class DailyAlertEngine:
         }
 
     def machine_sales_by_group(self, *, machine_id: int) -> dict[str, Any]:
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            current_day = state.current_day
-
+        current_day = self._engine_state().current_day
         machine = query_one(
             self.dbs.facts_db,
             """
@@ -1602,17 +2275,37 @@ class DailyAlertEngine:
             rows = query_all(
                 self.dbs.analysis_db,
                 """
-                SELECT COALESCE(NULLIF(TRIM(product_group), ''), 'unknown') AS product_group,
-                       COUNT(*) AS tx_count,
-                       ROUND(SUM(amount), 2) AS revenue,
-                       ROUND(AVG(amount), 4) AS avg_price,
-                       ROUND(AVG(expected_price), 4) AS avg_expected_price
-                FROM sim_transaction_expanded
-                WHERE run_id = ?
-                  AND machine_id = ?
-                  AND date = ?
-                GROUP BY COALESCE(NULLIF(TRIM(product_group), ''), 'unknown')
-                ORDER BY revenue DESC, tx_count DESC, product_group
+                WITH norm AS (
+                    -- Normalize product_group once per row; repeating the
+                    -- COALESCE/NULLIF/TRIM chain in both SELECT and GROUP BY
+                    -- makes SQLite evaluate it twice per row.
+                    SELECT COALESCE(NULLIF(TRIM(product_group), ''), 'unknown') AS product_group,
+                           amount,
+                           expected_price
+                    FROM sim_transaction_expanded
+                    WHERE run_id = ?
+                      AND machine_id = ?
+                      AND date = ?
+                ),
+                g AS (
+                    SELECT product_group,
+                           COUNT(*) AS tx_count,
+                           ROUND(SUM(amount), 2) AS revenue,
+                           ROUND(AVG(amount), 4) AS avg_price,
+                           ROUND(AVG(expected_price), 4) AS avg_expected_price
+                    FROM norm
+                    GROUP BY product_group
+                )
+                SELECT 0 AS is_total, * FROM g
+                UNION ALL
+                SELECT 1 AS is_total,
+                       'total',
+                       COALESCE(SUM(tx_count), 0),
+                       COALESCE(SUM(revenue), 0.0),
+                       NULL,
+                       NULL
+                FROM g
+                ORDER BY is_total, revenue DESC, tx_count DESC, product_group
                 """,
                 (self._run_id, machine_id, current_day.isoformat()),
                 readonly=True,
@@ -1621,36 +2314,33 @@ class DailyAlertEngine:
         grouped: list[dict[str, Any]] = []
         total_tx = 0
         total_revenue = 0.0
-        currency = self._location_currency().get(int(machine["location_id"]), "USD")
+        currency = self._location_currency().get(machine["location_id"], "USD")
         for row in rows:
-            tx_count = int(row.get("tx_count") or 0)
-            revenue = float(row.get("revenue") or 0.0)
-            total_tx += tx_count
-            total_revenue += revenue
+            # COUNT/SUM over non-empty groups never return NULL (and the total
+            # row is COALESCEd), so index directly; only the AVG columns can
+            # genuinely be NULL.
+            tx_count = row["tx_count"]
+            revenue = row["revenue"]
+            if row["is_total"]:
+                total_tx = tx_count
+                total_revenue = revenue
+                continue
             grouped.append(
                 {
-                    "product_group": str(row.get("product_group") or "unknown"),
+                    "product_group": row["product_group"],
                     "tx_count": tx_count,
                     "revenue": round(revenue, 2),
-                    "avg_price": (
-                        float(row["avg_price"])
-                        if row.get("avg_price") is not None
-                        else None
-                    ),
-                    "avg_expected_price": (
-                        float(row["avg_expected_price"])
-                        if row.get("avg_expected_price") is not None
-                        else None
-                    ),
+                    "avg_price": row["avg_price"],
+                    "avg_expected_price": row["avg_expected_price"],
                 }
             )
 
         return {
             "date": current_day.isoformat(),
-            "machine_id": int(machine["machine_id"]),
-            "machine_name": str(machine["machine_name"]),
-            "location_id": int(machine["location_id"]),
-            "location_name": str(machine["location_name"]),
+            "machine_id": machine["machine_id"],
+            "machine_name": machine["machine_name"],
+            "location_id": machine["location_id"],
+            "location_name": machine["location_name"],
             "currency": currency,
             "totals": {
                 "tx_count": total_tx,
@@ -1661,167 +2351,185 @@ class DailyAlertEngine:
 
     def get_inventory(self) -> dict[str, Any]:
         """Return current day start inventory and next-day start as end-of-day proxy."""
-        with Session(self.sql_engine) as session:
-            state = session.exec(select(EngineState).where(EngineState.id == 1)).one()
-            current_day = state.current_day
+        # Raw reads instead of ORM sessions: this endpoint only needs two
+        # scalar columns, so skip the Session lifecycle and row materialization.
+        state_row = query_one(
+            self.state_db, "SELECT current_day FROM engine_state WHERE id = 1"
+        )
+        if state_row is None:
+            raise ValueError("Engine not initialized")
+        current_day = date.fromisoformat(str(state_row["current_day"]))
 
         next_day = current_day + timedelta(days=1)
         self._ensure_inventory_through_day(target_day=next_day)
 
         location_currency = self._location_currency()
         machines = self._facts_machines()
-        capacities = self._facts_capacities()
-        caps_by_model_ing: dict[tuple[str, int], dict[str, Any]] = {
-            (str(r["machine_model"]), int(r["ingredient_id"])): r for r in capacities
-        }
-        machine_meta = {int(m["machine_id"]): m for m in machines}
-
-        with Session(self.sql_engine) as session:
-            start_rows = session.exec(
-                select(InventoryState).where(InventoryState.date == current_day)
-            ).all()
-            end_rows = session.exec(
-                select(InventoryState).where(InventoryState.date == next_day)
-            ).all()
-            actions = session.exec(
-                select(ManagerAction)
-                .where(ManagerAction.effective_date == next_day)
-                .where(ManagerAction.action_type == str(ActionType.RESTOCK_MACHINE))
-            ).all()
-        restock_machine_ids = {int(a.machine_id) for a in actions}
-
-        by_key_start: dict[tuple[int, int], InventoryState] = {
-            (int(r.machine_id), int(r.ingredient_id)): r for r in start_rows
-        }
-        by_key_end: dict[tuple[int, int], InventoryState] = {
-            (int(r.machine_id), int(r.ingredient_id)): r for r in end_rows
-        }
+        caps = self._caps_lookup()
+        caps_by_model_ing = caps.by_model_ing
+        caps_by_model = caps.by_model
+        machine_model_id = caps.machine_model_id
+
+        by_key_start = self._inventory_asof(day=current_day)
+        by_key_end = self._inventory_asof(day=next_day)
+        action_rows = query_all(
+            self.state_db,
+            """
+            SELECT machine_id
+            FROM manager_action
+            WHERE effective_date = ? AND action_type = ?
+            """,
+            (next_day.isoformat(), str(ActionType.RESTOCK_MACHINE)),
+        )
+        restock_machine_ids = {r["machine_id"] for r in action_rows}
 
         projected_end_by_key: dict[tuple[int, int], float] = {}
         consumption_by_machine: dict[int, dict[int, tuple[float, str]]] = {}
-        for (mid, iid), r in by_key_start.items():
-            qty = float(r.quantity_on_hand)
-            if self._run_id is not None:
-                consumption = consumption_by_machine.get(mid)
-                if consumption is None:
-                    consumption = self._predicted_consumption_for_day(
-                        run_id=self._run_id, machine_id=mid, day=current_day
-                    )
-                    consumption_by_machine[mid] = consumption
-                used, _unit = consumption.get(iid, (0.0, str(r.unit)))
-                qty = max(0.0, qty - float(used))
-
-            if mid in restock_machine_ids:
-                m = machine_meta.get(mid)
-                model = str(m["machine_model"]) if m else ""
-                cap = caps_by_model_ing.get((model, iid))
-                if cap is not None and str(cap.get("unit") or "") == str(r.unit):
-                    qty = float(cap["capacity"])
-
-            projected_end_by_key[(mid, iid)] = qty
-
-        locations: dict[int, dict[str, Any]] = {}
-        for mid, m in machine_meta.items():
-            loc_id = int(m["location_id"])
-            loc = locations.setdefault(
-                loc_id,
-                {
-                    "location_id": loc_id,
-                    "location_name": m["location_name"],
-                    "machines": {},
-                },
+        if self._run_id is not None:
+            consumption_by_machine = self._predicted_consumption_for_day_bulk(
+                run_id=self._run_id, day=current_day
             )
-            loc["machines"][mid] = {
-                "machine_id": mid,
-                "machine_name": m["machine_name"],
-                "ingredients": [],
-            }
-
-        for mid, m in machine_meta.items():
-            model = str(m["machine_model"])
-            machine_out = locations[int(m["location_id"])]["machines"][mid]
-            for (cap_model, iid), cap in caps_by_model_ing.items():
-                if cap_model != model:
-                    continue
-                key = (mid, iid)
-                s = by_key_start.get(key)
-                start_qty = float(s.quantity_on_hand) if s else 0.0
-                e = by_key_end.get(key)
-                end_qty = (
-                    projected_end_by_key.get(key)
-                    if key in projected_end_by_key
-                    else (float(e.quantity_on_hand) if e else start_qty)
+        # Two passes keyed by machine so per-machine state (consumption dict,
+        # restock membership, model id) is resolved once per machine instead of
+        # once per (machine, ingredient) row.
+        rows_by_machine: dict[int, list[tuple[int, float, str]]] = defaultdict(list)
+        for (mid, iid), (start_qty, unit) in by_key_start.items():
+            rows_by_machine[mid].append((iid, start_qty, unit))
+
+        no_consumption: dict[int, tuple[float, str]] = {}
+        for mid, items in rows_by_machine.items():
+            consumption = consumption_by_machine.get(mid, no_consumption)
+            restock = mid in restock_machine_ids
+            if not consumption and not restock:
+                # Nothing to adjust: carry quantities over on the dict
+                # comprehension fast path.
+                projected_end_by_key.update(
+                    {(mid, iid): qty for iid, qty, _unit in items}
                 )
-                machine_out["ingredients"].append(
+                continue
+            mdl = machine_model_id.get(mid, -1) if restock else -1
+            for iid, qty, unit in items:
+                if consumption:
+                    used, _unit = consumption.get(iid, (0.0, unit))
+                    qty = max(0.0, qty - float(used))
+                if restock:
+                    cap = caps_by_model_ing.get((mdl, iid))
+                    if cap is not None and str(cap["unit"] or "") == unit:
+                        qty = float(cap["capacity"])
+                projected_end_by_key[(mid, iid)] = qty
+
+        # _facts_machines orders by (location_id, machine_id) and
+        # _facts_capacities by (model, ingredient_name), so a single streaming
+        # pass emits locations, machines and ingredients already sorted —
+        # no nested working dicts, no trailing sorts.
+        result_locations = []
+        for loc_id, loc_machines in groupby(machines, key=lambda m: m["location_id"]):
+            loc_machines = list(loc_machines)
+            machines_out = []
+            for m in loc_machines:
+                mid = m["machine_id"]
+                model = m["machine_model"]
+                ingredients = []
+                for iid, cap in caps_by_model.get(model, ()):
+                    key = (mid, iid)
+                    s = by_key_start.get(key)
+                    start_qty = s[0] if s else 0.0
+                    e = by_key_end.get(key)
+                    end_qty = (
+                        projected_end_by_key.get(key)
+                        if key in projected_end_by_key
+                        else (e[0] if e else start_qty)
+                    )
+                    ingredients.append(
+                        IngredientRow(
+                            ingredient_id=iid,
+                            name=cap["ingredient_name"],
+                            quantity=round(start_qty, 1),
+                            unit=cap["unit"],
+                            capacity=round(float(cap["capacity"]), 1)
+                            if cap["capacity"] is not None
+                            else None,
+                            capacity_unit=cap["unit"],
+                            start_quantity=round(start_qty, 1),
+                            end_quantity=round(float(end_qty), 1)
+                            if end_qty is not None
+                            else None,
+                        )
+                    )
+                machines_out.append(
                     {
-                        "ingredient_id": iid,
-                        "name": cap.get("ingredient_name"),
-                        "quantity": round(start_qty, 1),
-                        "unit": cap.get("unit"),
-                        "capacity": round(float(cap["capacity"]), 1)
-                        if cap.get("capacity") is not None
-                        else None,
-                        "capacity_unit": cap.get("unit"),
-                        "start_quantity": round(start_qty, 1),
-                        "end_quantity": round(float(end_qty), 1)
-                        if end_qty is not None
-                        else None,
+                        "machine_id": mid,
+                        "machine_name": m["machine_name"],
+                        "ingredients": [r._asdict() for r in ingredients],
                     }
                 )
-
-            machine_out["ingredients"] = sorted(
-                machine_out["ingredients"], key=lambda r: str(r.get("name") or "")
-            )
-
-        result_locations = []
-        for loc in sorted(locations.values(), key=lambda x: x["location_id"]):
             result_locations.append(
                 {
-                    "location_id": loc["location_id"],
-                    "location_name": loc["location_name"],
-                    "currency": location_currency.get(loc["location_id"], "USD"),
-                    "machines": sorted(
-                        loc["machines"].values(), key=lambda x: x["machine_id"]
-                    ),
+                    "location_id": loc_id,
+                    "location_name": loc_machines[0]["location_name"],
+                    "currency": location_currency.get(loc_id, "USD"),
+                    "machines": machines_out,
                 }
             )
 
         return {"snapshot_date": current_day.isoformat(), "locations": result_locations}
 
+    # Location/currency mapping is nearly static, so avoid re-running the
+    # window-function query on every back-to-back comparison/dashboard call.
+    _LOC_CCY_TTL_SECONDS = 300.0
+
     def _location_currency(self) -> dict[int, str]:
+        if (
+            self._loc_ccy_cache is not None
+            and time.monotonic() - self._loc_ccy_cache[0] < self._LOC_CCY_TTL_SECONDS
+        ):
+            return self._loc_ccy_cache[1]
+        # Grouped MAX lookups instead of numbering every transaction with a
+        # window function: SQLite satisfies these with plain aggregations
+        # rather than a full-table sort.
         rows = query_all(
             self.dbs.observed_db,
             """
-            SELECT location_id, currency
-            FROM (
-                SELECT location_id,
-                       currency,
-                       ROW_NUMBER() OVER (
-                           PARTITION BY location_id
-                           ORDER BY date DESC, id DESC
-                       ) AS rn
-                FROM "transaction"
-            )
-            WHERE rn = 1
+            SELECT t.location_id, t.currency
+            FROM "transaction" AS t
+            JOIN (
+                SELECT tx.location_id AS location_id, MAX(tx.id) AS id
+                FROM "transaction" AS tx
+                JOIN (
+                    SELECT location_id, MAX(date) AS max_date
+                    FROM "transaction"
+                    GROUP BY location_id
+                ) AS latest
+                    ON latest.location_id = tx.location_id
+                    AND latest.max_date = tx.date
+                GROUP BY tx.location_id
+            ) AS pick ON pick.id = t.id
             """,
             readonly=True,
         )
-        return {int(row["location_id"]): str(row["currency"]) for row in rows}
+        mapping = {row["location_id"]: row["currency"] for row in rows}
+        self._loc_ccy_cache = (time.monotonic(), mapping)
+        return mapping
+
+    def invalidate_location_currency(self) -> None:
+        """Drop the cached location->currency map.
+
+        Call after any write to the observed "transaction" table so the next
+        read recomputes instead of waiting out the TTL.
+        """
+        self._loc_ccy_cache = None
 
     def run_backtest(self, *, start_day: date, end_day: date) -> list[dict[str, Any]]:
         if end_day < start_day:
             raise ValueError("end_day must be >= start_day")
 
-        outputs = []
-        cursor = start_day
-        while cursor <= end_day:
-            summary = self.run_for_day(cursor)
-            outputs.append(
-                {
-                    "run_date": summary.run_date,
-                    "executed_scripts": summary.executed_scripts,
-                    "emitted_alerts": summary.emitted_alerts,
-                }
-            )
-            cursor += timedelta(days=1)
+        # Prime the currency map once so the per-day runs hit the cache even
+        # when a long range outlives the TTL window.
+        self._location_currency()
+
+        n_days = (end_day - start_day).days + 1
+        outputs: list[dict[str, Any]] = [{}] * n_days
+        for i in range(n_days):
+            summary = self.run_for_day(start_day + timedelta(days=i))
+            outputs[i] = asdict(summary)
         return outputs
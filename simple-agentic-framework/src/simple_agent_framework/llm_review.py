@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from typing import Any, Literal
 from typing import cast
 from uuid import uuid4
 
+import orjson
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIResponsesModel, OpenAIResponsesModelSettings
@@ -95,13 +95,21 @@ def _build_review_prompt(
     related_open_alerts: list[dict[str, Any]],
     manager_note: str | None,
 ) -> str:
+    # The engine pre-normalizes dates to ISO strings, so orjson serializes
+    # everything on its C fast path; default=str only fires for stragglers.
+    alert_json = orjson.dumps(
+        alert, default=str, option=orjson.OPT_INDENT_2
+    ).decode()
     prompt_parts = [
-        f"## Alert to review\n```json\n{json.dumps(alert, indent=2, default=str)}\n```",
+        f"## Alert to review\n```json\n{alert_json}\n```",
     ]
     if related_open_alerts:
+        related_json = orjson.dumps(
+            related_open_alerts[:5], default=str, option=orjson.OPT_INDENT_2
+        ).decode()
         prompt_parts.append(
             f"## Related open alerts ({len(related_open_alerts)} total)\n"
-            f"```json\n{json.dumps(related_open_alerts[:5], indent=2, default=str)}\n```"
+            f"```json\n{related_json}\n```"
         )
     if manager_note:
         prompt_parts.append(f"## Manager note\n{manager_note}")
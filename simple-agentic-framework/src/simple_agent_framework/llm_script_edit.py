@@ -25,6 +25,12 @@ Constraints:
 - Return ONLY the Python code, no markdown fences, no explanation
 """
 
+# Compiled once at import; the edit endpoint can be hit in retry loops and
+# re.search would otherwise pay the pattern-cache lookup per call.
+_PY_FENCE = re.compile(r"```python\s*(.*?)\s*```", re.DOTALL)
+_ANY_FENCE = re.compile(r"```\s*(.*?)\s*```", re.DOTALL)
+_IMPORT_RE = re.compile(r"(^|\n)\s*import\s+")
+
 _agent: Agent[None, str] | None = None
 
 
@@ -51,39 +57,50 @@ def _strip_markdown_fences(text: str) -> str:
         return cleaned
 
     # Prefer ```python ... ```
-    match = re.search(r"```python\s*(.*?)\s*```", cleaned, flags=re.DOTALL)
+    match = _PY_FENCE.search(cleaned)
     if match:
         return match.group(1).strip()
 
-    match = re.search(r"```\s*(.*?)\s*```", cleaned, flags=re.DOTALL)
+    match = _ANY_FENCE.search(cleaned)
     if match:
         return match.group(1).strip()
 
     return cleaned
 
 
+class _SandboxValidator(ast.NodeVisitor):
+    """Single-pass Call checker that raises on the first violation.
+
+    NodeVisitor dispatches straight to visit_Call, so non-Call nodes skip the
+    per-node isinstance test ast.walk would pay, and the raise aborts the
+    traversal instead of walking the rest of the tree.
+    """
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if node.keywords:
+            func_name = "call"
+            if isinstance(func, ast.Name):
+                func_name = func.id
+            elif isinstance(func, ast.Attribute):
+                func_name = func.attr
+            raise ValueError(
+                f"Edited script uses keyword arguments in `{func_name}(...)`, which is not supported in the sandbox"
+            )
+        if isinstance(func, ast.Name) and func.id == "sorted" and len(node.args) != 1:
+            raise ValueError(
+                "Edited script uses `sorted()` with multiple arguments; this sandbox only supports `sorted(iterable)`"
+            )
+        self.generic_visit(node)
+
+
 def validate_sandbox_compatibility(code: str) -> None:
     try:
         tree = ast.parse(code)
     except SyntaxError as exc:
         raise ValueError(f"Edited script has invalid syntax: {exc}") from exc
 
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Call):
-            if node.keywords:
-                func_name = "call"
-                if isinstance(node.func, ast.Name):
-                    func_name = node.func.id
-                elif isinstance(node.func, ast.Attribute):
-                    func_name = node.func.attr
-                raise ValueError(
-                    f"Edited script uses keyword arguments in `{func_name}(...)`, which is not supported in the sandbox"
-                )
-            if isinstance(node.func, ast.Name) and node.func.id == "sorted":
-                if len(node.args) != 1:
-                    raise ValueError(
-                        "Edited script uses `sorted()` with multiple arguments; this sandbox only supports `sorted(iterable)`"
-                    )
+    _SandboxValidator().visit(tree)
 
 
 def edit_script_with_ai(
@@ -98,7 +115,7 @@ def edit_script_with_ai(
     edited = _strip_markdown_fences(str(result.output))
     edited = edited.strip() + "\n"
 
-    if re.search(r"(^|\n)\s*import\s+", edited):
+    if _IMPORT_RE.search(edited):
         raise ValueError("Edited script contains an import, which is not allowed")
     if "result" not in edited:
         raise ValueError("Edited script must set `result`")
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import difflib
+import hashlib
 import json
+import threading
+from collections import OrderedDict
 from typing import Any, Literal, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, RootModel
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIResponsesModel, OpenAIResponsesModelSettings
 
@@ -21,6 +26,16 @@ class ScriptDraftFinalCheck(BaseModel):
     )
 
 
+class _ScriptDraftFinalCheckBatch(RootModel[list[ScriptDraftFinalCheck]]):
+    pass
+
+
+class _ScriptDraftTriage(ScriptDraftFinalCheck):
+    confident: bool = Field(
+        description="True only if the verdict is clear-cut from the code and metrics alone"
+    )
+
+
 SYSTEM_PROMPT = """\
 You are reviewing a candidate alert-script edit for a vending simulation.
 You must choose exactly one recommendation:
@@ -36,47 +51,332 @@ Output must be concise and practical.
 If you choose try_again, include a concrete retry_instruction.
 """
 
+BATCH_SYSTEM_PROMPT = (
+    SYSTEM_PROMPT
+    + """
+You will receive several independent drafts, each under a numbered
+"# Draft N" heading. Return an array with exactly one object per draft,
+in input order.
+"""
+)
+
+TRIAGE_SYSTEM_PROMPT = (
+    SYSTEM_PROMPT
+    + """
+Also set `confident`: true only when the code change and comparison
+metrics make the verdict obvious. If the case needs careful weighing of
+trade-offs, set confident to false.
+"""
+)
+
 _agent: Agent[None, ScriptDraftFinalCheck] | None = None
+_batch_agent: Agent[None, _ScriptDraftFinalCheckBatch] | None = None
+_triage_agent: Agent[None, _ScriptDraftTriage] | None = None
+# The async path can be entered from several event-loop threads (API
+# workers); guard lazy construction so only one Agent is ever built.
+_agent_lock = threading.Lock()
+
+
+def _model_settings() -> OpenAIResponsesModelSettings:
+    return OpenAIResponsesModelSettings(
+        openai_reasoning_effort="medium",
+        openai_reasoning_summary="concise",
+    )
 
 
 def _get_agent() -> Agent[None, ScriptDraftFinalCheck]:
     global _agent
     if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                model = OpenAIResponsesModel("gpt-5.2")
+                _agent = cast(
+                    Agent[None, ScriptDraftFinalCheck],
+                    Agent(
+                        model,
+                        instructions=SYSTEM_PROMPT,
+                        output_type=ScriptDraftFinalCheck,
+                        model_settings=_model_settings(),
+                    ),
+                )
+    assert _agent is not None
+    return _agent
+
+
+def _get_triage_agent() -> Agent[None, _ScriptDraftTriage]:
+    global _triage_agent
+    if _triage_agent is None:
+        with _agent_lock:
+            if _triage_agent is None:
+                model = OpenAIResponsesModel("gpt-5.2")
+                # Minimal reasoning effort: most drafts are clear-cut, and
+                # this tier answers in a fraction of the medium tier's time.
+                settings = OpenAIResponsesModelSettings(
+                    openai_reasoning_effort="minimal",
+                    openai_reasoning_summary="concise",
+                )
+                _triage_agent = cast(
+                    Agent[None, _ScriptDraftTriage],
+                    Agent(
+                        model,
+                        instructions=TRIAGE_SYSTEM_PROMPT,
+                        output_type=_ScriptDraftTriage,
+                        model_settings=settings,
+                    ),
+                )
+    assert _triage_agent is not None
+    return _triage_agent
+
+
+def _get_batch_agent() -> Agent[None, _ScriptDraftFinalCheckBatch]:
+    global _batch_agent
+    if _batch_agent is None:
         model = OpenAIResponsesModel("gpt-5.2")
-        settings = OpenAIResponsesModelSettings(
-            openai_reasoning_effort="medium",
-            openai_reasoning_summary="concise",
-        )
-        _agent = cast(
-            Agent[None, ScriptDraftFinalCheck],
+        _batch_agent = cast(
+            Agent[None, _ScriptDraftFinalCheckBatch],
             Agent(
                 model,
-                instructions=SYSTEM_PROMPT,
-                output_type=ScriptDraftFinalCheck,
-                model_settings=settings,
+                instructions=BATCH_SYSTEM_PROMPT,
+                output_type=_ScriptDraftFinalCheckBatch,
+                model_settings=_model_settings(),
             ),
         )
-    assert _agent is not None
-    return _agent
+    assert _batch_agent is not None
+    return _batch_agent
 
 
-def final_check_script_draft_with_ai(
+def _build_check_prompt(
     *,
     script_name: str,
     edit_instruction: str,
     old_code: str,
     new_code: str,
     comparison: dict[str, Any],
-) -> dict[str, Any]:
-    prompt = "\n\n".join(
+) -> str:
+    # Input tokens drive both latency and cost, so keep the prompt lean:
+    # when the edit is localized, a unified diff carries the same
+    # information as repeating the whole old script.
+    diff_text = "\n".join(
+        difflib.unified_diff(
+            old_code.splitlines(),
+            new_code.splitlines(),
+            fromfile="old",
+            tofile="new",
+            lineterm="",
+        )
+    )
+    if diff_text and len(diff_text) < len(old_code) // 2:
+        old_section = f"## Changes from old script (unified diff)\n```diff\n{diff_text}\n```"
+    else:
+        old_section = f"## Old script\n```python\n{old_code}\n```"
+
+    comparison_json = json.dumps(comparison, separators=(",", ":"), default=str)
+    return "\n\n".join(
         [
             f"## Script name\n{script_name}",
             f"## Edit instruction\n{edit_instruction or '(none provided)'}",
-            f"## Old script\n```python\n{old_code}\n```",
+            old_section,
             f"## New draft script\n```python\n{new_code}\n```",
-            f"## Historical comparison\n```json\n{json.dumps(comparison, indent=2, default=str)}\n```",
+            f"## Historical comparison\n```json\n{comparison_json}\n```",
         ]
     )
-    result = _get_agent().run_sync(prompt)
-    out: ScriptDraftFinalCheck = result.output
-    return out.model_dump(mode="json")
+
+
+# Identical (script, instruction, codes, comparison) tuples recur across
+# retry loops and re-evaluations; each miss is a multi-second reasoning
+# round-trip, so memoize results content-addressed by the prompt digest.
+_CHECK_CACHE_MAX = 512
+_check_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+# Output tokens decode sequentially, so cap how many drafts share one call.
+BATCH_MAX_DRAFTS = 8
+
+
+def _cache_get(key: str) -> dict[str, Any] | None:
+    cached = _check_cache.get(key)
+    if cached is not None:
+        _check_cache.move_to_end(key)
+    return cached
+
+
+def _cache_put(key: str, payload: dict[str, Any]) -> None:
+    _check_cache[key] = payload
+    while len(_check_cache) > _CHECK_CACHE_MAX:
+        _check_cache.popitem(last=False)
+
+
+def _deterministic_check(
+    *,
+    old_code: str,
+    new_code: str,
+    comparison: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Resolve clear-cut drafts without any LLM call.
+
+    Returns a verdict payload, or None when the case genuinely needs
+    model judgement.
+    """
+    old_lines = [line.rstrip() for line in old_code.strip().splitlines()]
+    new_lines = [line.rstrip() for line in new_code.strip().splitlines()]
+    if old_lines == new_lines:
+        return {
+            "recommended_action": "try_again",
+            "rationale": "Draft is identical to the active script apart from whitespace; the edit made no functional change.",
+            "retry_instruction": "Apply the requested change; the previous draft did not alter the script's behavior.",
+        }
+
+    old_days = comparison.get("old_days_triggered")
+    new_days = comparison.get("new_days_triggered")
+    old_total = comparison.get("old_total_alerts")
+    new_total = comparison.get("new_total_alerts")
+    if None not in (old_days, new_days, old_total, new_total):
+        # Strictly less noisy while still firing: accept without reasoning.
+        if 0 < new_days < old_days and new_total < old_total:
+            return {
+                "recommended_action": "accept_draft",
+                "rationale": (
+                    f"Draft strictly reduces noise: days triggered {old_days} -> {new_days}, "
+                    f"total alerts {old_total} -> {new_total}, and the script still fires."
+                ),
+                "retry_instruction": None,
+            }
+    return None
+
+
+def final_check_script_draft_with_ai(
+    *,
+    script_name: str,
+    edit_instruction: str,
+    old_code: str,
+    new_code: str,
+    comparison: dict[str, Any],
+) -> dict[str, Any]:
+    prompt = _build_check_prompt(
+        script_name=script_name,
+        edit_instruction=edit_instruction,
+        old_code=old_code,
+        new_code=new_code,
+        comparison=comparison,
+    )
+    key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    cached = _cache_get(key)
+    if cached is not None:
+        return dict(cached)
+
+    payload = _deterministic_check(
+        old_code=old_code, new_code=new_code, comparison=comparison
+    )
+    if payload is None:
+        # Tiered effort: try the minimal-reasoning triage first and only
+        # escalate to the medium tier when it reports low confidence.
+        triage = _get_triage_agent().run_sync(prompt).output
+        if triage.confident:
+            payload = triage.model_dump(mode="json", exclude={"confident"})
+        else:
+            result = _get_agent().run_sync(prompt)
+            out: ScriptDraftFinalCheck = result.output
+            payload = out.model_dump(mode="json")
+    _cache_put(key, payload)
+    return dict(payload)
+
+
+def final_check_script_drafts_batch(
+    items: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Final-check several drafts, sharing one reasoning call per batch.
+
+    Each item takes the same keyword fields as
+    final_check_script_draft_with_ai. Cache hits are served locally; only
+    misses are marshalled into batched prompts of at most BATCH_MAX_DRAFTS,
+    amortizing system-prompt prefill and reasoning overhead across drafts.
+    """
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    miss_indexes: list[int] = []
+    miss_prompts: list[str] = []
+    miss_keys: list[str] = []
+    for i, item in enumerate(items):
+        prompt = _build_check_prompt(**item)
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        cached = _cache_get(key)
+        if cached is not None:
+            results[i] = dict(cached)
+        else:
+            miss_indexes.append(i)
+            miss_prompts.append(prompt)
+            miss_keys.append(key)
+
+    for start in range(0, len(miss_indexes), BATCH_MAX_DRAFTS):
+        chunk = slice(start, start + BATCH_MAX_DRAFTS)
+        indexes = miss_indexes[chunk]
+        prompts = miss_prompts[chunk]
+        keys = miss_keys[chunk]
+        if len(indexes) == 1:
+            # No amortization to gain; the single-draft agent keeps its
+            # simpler output schema.
+            item = items[indexes[0]]
+            results[indexes[0]] = final_check_script_draft_with_ai(**item)
+            continue
+
+        batch_prompt = "\n\n".join(
+            f"# Draft {n + 1}\n\n{prompt}" for n, prompt in enumerate(prompts)
+        )
+        result = _get_batch_agent().run_sync(batch_prompt)
+        checks = result.output.root
+        if len(checks) != len(indexes):
+            # The model broke the one-object-per-draft contract; fall back
+            # to individual calls rather than misattributing verdicts.
+            for idx in indexes:
+                results[idx] = final_check_script_draft_with_ai(**items[idx])
+            continue
+        for idx, key, check in zip(indexes, keys, checks):
+            payload = check.model_dump(mode="json")
+            _cache_put(key, payload)
+            results[idx] = dict(payload)
+
+    return cast("list[dict[str, Any]]", results)
+
+
+# Async path: overlap the network/decoding latency of independent drafts
+# instead of serializing run_sync calls. The semaphore bounds in-flight
+# requests so a large retry burst does not trip provider rate limits.
+_CONCURRENT_CHECKS_MAX = 5
+_sem = asyncio.Semaphore(_CONCURRENT_CHECKS_MAX)
+
+
+async def _run_check(prompt: str) -> ScriptDraftFinalCheck:
+    async with _sem:
+        result = await _get_agent().run(prompt)
+    return result.output
+
+
+async def final_check_script_drafts_async(
+    items: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Final-check several drafts concurrently on the running event loop.
+
+    Same item shape and caching as final_check_script_drafts_batch, but each
+    draft keeps its own single-object call; total wall time approaches
+    ceil(misses / _CONCURRENT_CHECKS_MAX) times one call's latency.
+    """
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    miss_indexes: list[int] = []
+    miss_prompts: list[str] = []
+    miss_keys: list[str] = []
+    for i, item in enumerate(items):
+        prompt = _build_check_prompt(**item)
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        cached = _cache_get(key)
+        if cached is not None:
+            results[i] = dict(cached)
+        else:
+            miss_indexes.append(i)
+            miss_prompts.append(prompt)
+            miss_keys.append(key)
+
+    checks = await asyncio.gather(*(_run_check(p) for p in miss_prompts))
+    for idx, key, check in zip(miss_indexes, miss_keys, checks):
+        payload = check.model_dump(mode="json")
+        _cache_put(key, payload)
+        results[idx] = dict(payload)
+
+    return cast("list[dict[str, Any]]", results)
@@ -5,7 +5,7 @@ from datetime import date, datetime
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import Column, DateTime, Field, SQLModel, Text
 
 from .time_utils import utc_now
@@ -102,6 +102,16 @@ class Alert(SQLModel, table=True):
             "status",
             "created_at",
         ),
+        # Covers the dedup probe and OPEN-alert preload: every one of those
+        # readers filters status = 'OPEN', so a partial index keeps only the
+        # live rows — smaller leaves, more entries per page — and drops the
+        # status column from each entry entirely.
+        Index(
+            "ix_alert_open_fp_created",
+            "fingerprint",
+            "created_at",
+            sqlite_where=text("status = 'OPEN'"),
+        ),
     )
 
 
@@ -134,6 +144,12 @@ class AlertSuppression(SQLModel, table=True):
             "machine_id",
             name="uq_alert_suppression_key",
         ),
+        Index(
+            "ix_suppression_loc_mach_type",
+            "location_id",
+            "machine_id",
+            "alert_type",
+        ),
     )
 
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from collections.abc import Mapping
 from datetime import date, timedelta
+from functools import lru_cache
 import json
 from pathlib import Path
 from typing import Any
@@ -104,6 +105,39 @@ def _resolve_projection_anchor_date(
     return str(row["projection_date"])
 
 
+@lru_cache(maxsize=256)
+def _location_row(facts_db: Path, location_id: int) -> dict[str, Any] | None:
+    """Location facts are immutable, and every machine in a location re-reads
+    the same row once per context build; cache per (db, id)."""
+    return query_one(
+        facts_db,
+        "SELECT id, name, timezone, region, external_id FROM location WHERE id = ?",
+        (location_id,),
+        readonly=True,
+    )
+
+
+@lru_cache(maxsize=8)
+def _latest_run_info(analysis_db: Path) -> tuple[str | None, str | None]:
+    """Resolve (run_id, seed_start_date) for the latest sim run once per DB."""
+    run_row = query_one(
+        analysis_db,
+        "SELECT id FROM sim_run ORDER BY created_at DESC LIMIT 1",
+        readonly=True,
+    )
+    run_id = str(run_row["id"]) if run_row and run_row.get("id") else None
+    if run_id is None:
+        return None, None
+    seed_row = query_one(
+        analysis_db,
+        "SELECT seed_start_date FROM sim_run WHERE id = ?",
+        (run_id,),
+        readonly=True,
+    )
+    seed_raw = seed_row.get("seed_start_date") if seed_row else None
+    return run_id, str(seed_raw) if seed_raw else None
+
+
 def _to_float_or_none(value: Any) -> float | None:
     try:
         if value is None:
@@ -278,14 +312,10 @@ def build_script_context(
     if machine is None:
         raise ValueError(f"Machine {machine_id} not found for location {location_id}")
 
-    location = query_one(
-        dbs.facts_db,
-        "SELECT id, name, timezone, region, external_id FROM location WHERE id = ?",
-        (location_id,),
-        readonly=True,
-    )
-    if location is None:
+    cached_location = _location_row(dbs.facts_db, location_id)
+    if cached_location is None:
         raise ValueError(f"Location {location_id} not found")
+    location = dict(cached_location)
 
     history_daily = query_all(
         dbs.observed_db,
@@ -343,21 +373,9 @@ def build_script_context(
         readonly=True,
     )
 
-    run_row = query_one(
-        dbs.analysis_db,
-        "SELECT id FROM sim_run ORDER BY created_at DESC LIMIT 1",
-        readonly=True,
-    )
-    run_id = str(run_row["id"]) if run_row and run_row.get("id") else None
+    run_id, seed_start_date_raw = _latest_run_info(dbs.analysis_db)
 
     if run_id:
-        seed_row = query_one(
-            dbs.analysis_db,
-            "SELECT seed_start_date FROM sim_run WHERE id = ?",
-            (run_id,),
-            readonly=True,
-        )
-        seed_start_date_raw = seed_row.get("seed_start_date") if seed_row else None
         seed_start_date = (
             date.fromisoformat(str(seed_start_date_raw)[:10])
             if seed_start_date_raw
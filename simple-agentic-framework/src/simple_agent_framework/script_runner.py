@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import math
 from datetime import date, timedelta
+from functools import lru_cache
 from typing import Any
 
 import pydantic_monty
@@ -88,6 +89,22 @@ EXTERNAL_FUNCTIONS: dict[str, Any] = {
 }
 
 
+@lru_cache(maxsize=128)
+def _compile_script(script_name: str, full_code: str) -> pydantic_monty.Monty:
+    """Parse/compile a script once per (name, code) pair.
+
+    Monty separates compilation from execution, so the same compiled object
+    is re-run with fresh inputs for every machine instead of re-parsing the
+    identical source per (machine, script) invocation.
+    """
+    return pydantic_monty.Monty(
+        full_code,
+        inputs=SCRIPT_CONTEXT_INPUT_NAMES,
+        external_functions=list(EXTERNAL_FUNCTIONS.keys()),
+        script_name=f"{script_name}.py",
+    )
+
+
 def run_script(
     *,
     script_name: str,
@@ -108,12 +125,7 @@ def run_script(
     # Append bare `result` so Monty returns the variable as the last expression
     full_code = code.rstrip() + "\nresult\n"
     try:
-        m = pydantic_monty.Monty(
-            full_code,
-            inputs=SCRIPT_CONTEXT_INPUT_NAMES,
-            external_functions=list(EXTERNAL_FUNCTIONS.keys()),
-            script_name=f"{script_name}.py",
-        )
+        m = _compile_script(script_name, full_code)
         output = m.run(
             inputs=normalized_context,
             external_functions=EXTERNAL_FUNCTIONS,